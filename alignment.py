@@ -0,0 +1,111 @@
+import re
+from bisect import bisect_right
+from collections import defaultdict
+
+# How many transcript words may be skipped to reach the next script word.
+# Keeps the search local so a repeated word ("I", "okay") matches its next
+# occurrence instead of one much later in the audio.
+MAX_SKIP = 8
+
+
+def normalize_word(word):
+    """Lowercase and drop punctuation (keeping apostrophes) so script and transcript words compare equal"""
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class WordIndex:
+    """Transcript words indexed by text, each with its sorted list of positions"""
+
+    def __init__(self, timestamps):
+        self.timestamps = timestamps
+        self.positions = defaultdict(list)
+        for i, t in enumerate(timestamps):
+            self.positions[normalize_word(t['word'])].append(i)
+
+    def next_occurrence(self, word, after):
+        """First transcript position of `word` strictly after position `after`, or None"""
+        occurrences = self.positions.get(word)
+        if not occurrences:
+            return None
+        i = bisect_right(occurrences, after)
+        return occurrences[i] if i < len(occurrences) else None
+
+
+def match_words(script_words, index, max_skip=MAX_SKIP):
+    """Monotonic match of script words to transcript positions (None when unmatched).
+
+    Each script word takes the next occurrence after the previous match, if it is
+    within max_skip transcript words, so matching is linear in the script length
+    and never goes backwards in time. Every unmatched script word widens the
+    window by one, so after a long misrecognized run the next words can still
+    reach their transcript positions.
+    """
+    matches = []
+    cursor = -1
+    missed = 0  # script words since the last match
+    for word in script_words:
+        position = index.next_occurrence(normalize_word(word), cursor)
+        if position is not None and position - cursor <= max_skip + 1 + missed:
+            matches.append(position)
+            cursor = position
+            missed = 0
+        else:
+            matches.append(None)
+            missed += 1
+    return matches
+
+
+def align_words(script_words, timestamps, default_duration=0.25, gap=0.08):
+    """(start, end) for every script word, using Whisper timings where words match.
+
+    Unmatched runs are spread evenly over the gap between their matched
+    neighbours, or laid out at default_duration when a run has no neighbour
+    on one side.
+    """
+    index = WordIndex(timestamps)
+    matches = match_words(script_words, index)
+    timings = [None] * len(script_words)
+    for i, position in enumerate(matches):
+        if position is not None:
+            t = timestamps[position]
+            timings[i] = (t['start'], t['end'])
+
+    i = 0
+    while i < len(timings):
+        if timings[i] is not None:
+            i += 1
+            continue
+        run_start = i
+        while i < len(timings) and timings[i] is None:
+            i += 1
+        run_length = i - run_start
+        left = timings[run_start - 1][1] if run_start > 0 else None
+        right = timings[i][0] if i < len(timings) else None
+
+        if left is not None and right is not None and right - left > gap * (run_length + 1):
+            # Share the silence between the neighbours
+            step = (right - left) / run_length
+            for k in range(run_length):
+                start = left + k * step
+                timings[run_start + k] = (start + gap, start + step)
+        elif right is not None and left is None:
+            # Leading words: count back from the first matched word
+            for k in range(run_length):
+                end = right - gap - (run_length - 1 - k) * (default_duration + gap)
+                timings[run_start + k] = (max(0.0, end - default_duration), max(0.0, end))
+        else:
+            # Trailing words, or no room between neighbours: continue after the previous word
+            start = (left if left is not None else 0.0) + gap
+            for k in range(run_length):
+                timings[run_start + k] = (start, start + default_duration)
+                start += default_duration + gap
+    return timings
+
+
+def even_word_timings(words, start, duration):
+    """{'word', 'start', 'end'} for words spread evenly over [start, start + duration]"""
+    if not words:
+        return []
+    step = duration / len(words)
+    return [{'word': word, 'start': start + i * step, 'end': start + (i + 1) * step}
+            for i, word in enumerate(words)]
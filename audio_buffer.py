@@ -0,0 +1,95 @@
+import os
+from math import gcd
+import numpy as np
+import soundfile as sf
+from audio_info import remember_audio
+
+# --- SETTINGS ---
+# Write the intermediate buffers of each stage into the job workspace, for debugging
+AUDIO_DEBUG = os.environ.get("AUDIO_DEBUG") == "1"
+WHISPER_SAMPLE_RATE = 16000
+
+
+class AudioBuffer:
+    """Decoded audio passed between pipeline stages: float32 samples shaped (frames, channels).
+
+    Stages hand buffers to each other instead of files, so audio is decoded once
+    and encoded once, when the final file is written.
+    """
+
+    def __init__(self, samples, sample_rate):
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+        self.samples = samples
+        self.sample_rate = int(sample_rate)
+
+    @classmethod
+    def from_file(cls, path):
+        samples, sample_rate = sf.read(path, dtype='float32', always_2d=True)
+        return cls(samples, sample_rate)
+
+    @property
+    def frames(self):
+        return self.samples.shape[0]
+
+    @property
+    def channels(self):
+        return self.samples.shape[1]
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def mono(self):
+        """1-D float32 samples, channels averaged"""
+        return self.samples.mean(axis=1) if self.channels > 1 else self.samples[:, 0]
+
+    def with_channels(self, channels):
+        if channels == self.channels:
+            return self
+        if channels == 1:
+            return AudioBuffer(self.mono(), self.sample_rate)
+        return AudioBuffer(np.repeat(self.samples[:, :1], channels, axis=1), self.sample_rate)
+
+    def resampled(self, sample_rate):
+        if sample_rate == self.sample_rate:
+            return self
+        from scipy.signal import resample_poly
+        divisor = gcd(sample_rate, self.sample_rate)
+        samples = resample_poly(self.samples, sample_rate // divisor, self.sample_rate // divisor, axis=0)
+        return AudioBuffer(samples, sample_rate)
+
+    def peak_normalized(self, peak=0.9):
+        loudest = float(np.abs(self.samples).max()) if self.frames else 0.0
+        return AudioBuffer(self.samples * (peak / max(0.01, loudest)), self.sample_rate)
+
+    def for_whisper(self):
+        """16 kHz mono array, the input transcribe_words takes without decoding"""
+        return self.resampled(WHISPER_SAMPLE_RATE).mono()
+
+    def write(self, path):
+        """Encode to path (format from the extension) and record its metadata"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        sf.write(path, self.samples, self.sample_rate)
+        remember_audio(path, self.duration, self.sample_rate, self.channels)
+        return path
+
+
+def concatenate(buffers, sample_rate=None, channels=None):
+    """One buffer from several, converted to a shared sample rate and channel count"""
+    sample_rate = sample_rate or buffers[0].sample_rate
+    channels = channels or buffers[0].channels
+    parts = [b.resampled(sample_rate).with_channels(channels).samples for b in buffers]
+    return AudioBuffer(np.concatenate(parts), sample_rate)
+
+
+def load_audio(audio):
+    """AudioBuffer for a path or an AudioBuffer"""
+    return audio if isinstance(audio, AudioBuffer) else AudioBuffer.from_file(audio)
+
+
+def debug_dump(buffer, workspace, name):
+    """Write an intermediate buffer to the workspace when AUDIO_DEBUG=1"""
+    if AUDIO_DEBUG and workspace is not None:
+        buffer.write(workspace.file(name))
@@ -0,0 +1,73 @@
+import os
+import json
+import threading
+import subprocess
+from collections import OrderedDict
+import soundfile as sf
+
+# --- SETTINGS ---
+# Files whose metadata is kept in memory per process
+AUDIO_INFO_CACHE_SIZE = 1024
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def _read_header(path):
+    """(duration, sample rate, channels) from the file header, in process.
+
+    libsndfile reads wav, flac, ogg and mp3 headers; anything else falls back to
+    a single ffprobe call.
+    """
+    try:
+        info = sf.info(path)
+        return info.frames / info.samplerate, info.samplerate, info.channels
+    except RuntimeError:
+        result = subprocess.run([
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 'a:0',
+            '-show_entries', 'stream=sample_rate,channels:format=duration',
+            '-of', 'json',
+            path
+        ], capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout)
+        stream = probe['streams'][0]
+        return float(probe['format']['duration']), int(stream['sample_rate']), int(stream['channels'])
+
+
+def _store(key, info):
+    with _cache_lock:
+        _cache[key] = info
+        _cache.move_to_end(key)
+        while len(_cache) > AUDIO_INFO_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def audio_info(path):
+    """{'duration', 'sample_rate', 'channels'} of an audio file, cached by path and mtime"""
+    key = _file_key(path)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    duration, sample_rate, channels = _read_header(path)
+    info = {'duration': duration, 'sample_rate': sample_rate, 'channels': channels}
+    _store(key, info)
+    return info
+
+
+def audio_duration(path):
+    return audio_info(path)['duration']
+
+
+def remember_audio(path, duration, sample_rate, channels=1):
+    """Record metadata for a file just written from a decoded buffer, so it is never read back"""
+    info = {'duration': duration, 'sample_rate': sample_rate, 'channels': channels}
+    _store(_file_key(path), info)
+    return info
@@ -0,0 +1,314 @@
+import os
+import sys
+import json
+import random
+import tempfile
+import subprocess
+import threading
+from bisect import bisect_right
+from fractions import Fraction
+from disk_cache import DiskCache, CACHE_ROOT, hash_key
+from encoding_profiles import output_size
+
+# --- SETTINGS ---
+BACKDROP_DIR = "downloads"
+BACKDROP_EXTENSIONS = ('.mp4', '.avi', '.mov')
+BACKDROP_CACHE_BYTES = int(os.environ.get("BACKDROP_CACHE_MB", 16)) * 1024 * 1024
+# Proxies live outside the size-capped caches: a render may be reading one at any time.
+# Each backdrop keeps one, replaced when the backdrop file changes.
+PROXY_DIR = os.path.join(CACHE_ROOT, "backdrop_proxies")
+# Build proxies on first use (otherwise only `python backdrops.py --proxy` builds them)
+BUILD_PROXIES = os.environ.get("BACKDROP_PROXIES") == "1"
+# Proxy format: publish frame rate, a keyframe every second, height capped like a profile
+PROXY_FPS = 60
+PROXY_HEIGHT = int(os.environ.get("BACKDROP_PROXY_HEIGHT", 1920))
+PROXY_KEYFRAME_INTERVAL = 1.0
+# Chunk library: each backdrop pre-cut into fixed-length clips in the render format
+CHUNK_ROOT = os.environ.get("BACKDROP_CHUNK_DIR", "backdrop_chunks")
+CHUNK_SECONDS = 32
+# Chunk height cap; the width follows the source's aspect ratio, like a proxy
+CHUNK_HEIGHT = int(os.environ.get("BACKDROP_CHUNK_HEIGHT", 1920))
+CHUNK_FPS = int(os.environ.get("BACKDROP_CHUNK_FPS", 60))
+# Bump when the probe or proxy format changes so old entries are not reused
+INDEX_VERSION = 1
+
+_index = None
+_proxy_lock = threading.Lock()
+
+
+def list_backdrops(directory=BACKDROP_DIR):
+    return sorted(f for f in os.listdir(directory) if f.endswith(BACKDROP_EXTENSIONS))
+
+
+def _get_index():
+    global _index
+    if _index is None:
+        _index = DiskCache("backdrops", BACKDROP_CACHE_BYTES, suffix=".json")
+    return _index
+
+
+def _file_key(path):
+    # Size and mtime instead of a content hash: backdrops can be several GB
+    stat = os.stat(path)
+    return hash_key(os.path.abspath(path), stat.st_size, stat.st_mtime_ns, INDEX_VERSION)
+
+
+def probe_backdrop(path):
+    """Duration, resolution, fps and keyframe times of a video, read with ffprobe"""
+    result = subprocess.run([
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height,avg_frame_rate:format=duration',
+        '-of', 'default=noprint_wrappers=1',
+        path
+    ], capture_output=True, text=True, check=True)
+    fields = dict(line.split('=', 1) for line in result.stdout.splitlines() if '=' in line)
+
+    # Packet flags mark keyframes without decoding any frames
+    packets = subprocess.run([
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        path
+    ], capture_output=True, text=True, check=True)
+    keyframes = []
+    for line in packets.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(round(float(pts_time), 3))
+
+    return {
+        'duration': float(fields['duration']),
+        'width': int(fields['width']),
+        'height': int(fields['height']),
+        'fps': float(Fraction(fields['avg_frame_rate'])) if fields.get('avg_frame_rate', '0/0') != '0/0' else None,
+        'keyframes': sorted(set(keyframes)),
+    }
+
+
+def _proxy_prefix(path):
+    return hash_key(os.path.abspath(path))[:16]
+
+
+def _proxy_path(path, proxy_key):
+    """Proxy file for one version of a backdrop: <source prefix>-<version key>.mp4"""
+    return os.path.join(PROXY_DIR, f"{_proxy_prefix(path)}-{proxy_key[:32]}.mp4")
+
+
+def _store_proxy(path, info, proxy_path):
+    """Build a proxy into place, then delete the proxies of the backdrop's older versions"""
+    os.makedirs(PROXY_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=PROXY_DIR, prefix='.tmp-', suffix='.mp4')
+    os.close(fd)
+    try:
+        _build_proxy(path, info, temp_path)
+        os.replace(temp_path, proxy_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    prefix = _proxy_prefix(path) + '-'
+    for name in os.listdir(PROXY_DIR):
+        stale = os.path.join(PROXY_DIR, name)
+        if name.startswith(prefix) and stale != proxy_path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    return proxy_path
+
+
+def _build_proxy(path, info, proxy_path):
+    """Re-encode a backdrop at proxy settings with frequent keyframes and no audio"""
+    width, height = output_size({'height': PROXY_HEIGHT}, (info['width'], info['height']))
+    fps = min(PROXY_FPS, info['fps'] or PROXY_FPS)
+    subprocess.run([
+        'ffmpeg',
+        '-v', 'error',
+        '-i', path,
+        '-an',
+        '-vf', f"fps={fps},scale={width}:{height}",
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '18',
+        '-pix_fmt', 'yuv420p',
+        # Fixed GOP so any whole second is a cheap seek target
+        '-g', str(max(1, round(fps * PROXY_KEYFRAME_INTERVAL))),
+        '-sc_threshold', '0',
+        '-movflags', '+faststart',
+        '-f', 'mp4',
+        '-y', proxy_path
+    ], check=True)
+
+
+def backdrop_info(path, build_proxy=BUILD_PROXIES):
+    """Indexed metadata for a backdrop, probed once per file version.
+
+    With a proxy the result also carries 'proxy' (its path) and 'proxy_info'
+    (the proxy's own metadata, including its keyframes).
+    """
+    index = _get_index()
+    key = _file_key(path)
+    info = index.get_json(key)
+    if info is None:
+        print(f"Indexing backdrop {path}...")
+        info = probe_backdrop(path)
+        index.put_json(key, info)
+
+    proxy_key = hash_key(key, PROXY_FPS, PROXY_HEIGHT, PROXY_KEYFRAME_INTERVAL)
+    proxy_path = _proxy_path(path, proxy_key)
+    with _proxy_lock:
+        if not os.path.exists(proxy_path):
+            if not build_proxy:
+                return info
+            print(f"Building proxy for {path}...")
+            _store_proxy(path, info, proxy_path)
+
+    proxy_info = index.get_json(proxy_key)
+    if proxy_info is None:
+        proxy_info = probe_backdrop(proxy_path)
+        index.put_json(proxy_key, proxy_info)
+    return dict(info, proxy=proxy_path, proxy_info=proxy_info)
+
+
+# --- Chunk library ---
+def _manifest_path():
+    return os.path.join(CHUNK_ROOT, "manifest.json")
+
+
+def load_manifest():
+    """{backdrop path: chunk set} for every chunked backdrop"""
+    try:
+        with open(_manifest_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest):
+    os.makedirs(CHUNK_ROOT, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=CHUNK_ROOT, prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, _manifest_path())
+
+
+def build_chunks(path, length=CHUNK_SECONDS, size=None, fps=CHUNK_FPS):
+    """Cut a backdrop into `length`-second clips in one encode and record them in the manifest.
+
+    Clips keep the source's aspect ratio with their height capped at CHUNK_HEIGHT,
+    or are scaled to cover `size` (width, height) and center-cropped when one is
+    given. They are resampled to `fps` and carry no audio, so a render decodes a
+    small file that already matches the output format. A trailing clip shorter
+    than `length` is dropped.
+    """
+    info = backdrop_info(path, build_proxy=False)
+    key = _file_key(path)
+    directory = os.path.join(CHUNK_ROOT, key[:16])
+    os.makedirs(directory, exist_ok=True)
+    if size is None:
+        width, height = output_size({'height': CHUNK_HEIGHT}, (info['width'], info['height']))
+        # Even dimensions for yuv420p
+        width, height = width // 2 * 2, height // 2 * 2
+        frame_filter = f"scale={width}:{height}"
+    else:
+        width, height = size
+        frame_filter = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+
+    print(f"Cutting {path} into {length}s chunks...")
+    subprocess.run([
+        'ffmpeg',
+        '-v', 'error',
+        '-i', path,
+        '-an',
+        '-vf', f"fps={fps},{frame_filter}",
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '18',
+        '-pix_fmt', 'yuv420p',
+        # A keyframe at every cut so each segment starts cleanly
+        '-force_key_frames', f"expr:gte(t,n_forced*{length})",
+        '-f', 'segment',
+        '-segment_time', str(length),
+        '-reset_timestamps', '1',
+        '-segment_format_options', 'movflags=+faststart',
+        '-y', os.path.join(directory, 'chunk_%04d.mp4')
+    ], check=True)
+
+    full_chunks = int(info['duration'] // length)
+    chunks = [os.path.join(directory, f'chunk_{i:04d}.mp4') for i in range(full_chunks)]
+    for name in os.listdir(directory):
+        if os.path.join(directory, name) not in chunks:
+            os.remove(os.path.join(directory, name))
+
+    manifest = load_manifest()
+    manifest[os.path.abspath(path)] = {
+        'source_key': key,
+        'length': length,
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'chunks': chunks,
+    }
+    _save_manifest(manifest)
+    return manifest[os.path.abspath(path)]
+
+
+def backdrop_chunks(path, length):
+    """Current chunk paths for a backdrop cut at `length` seconds, or [] when there are none"""
+    entry = load_manifest().get(os.path.abspath(path))
+    if not entry or entry['length'] != length or entry['source_key'] != _file_key(path):
+        return []
+    return [chunk for chunk in entry['chunks'] if os.path.exists(chunk)]
+
+
+def _snap(keyframes, t):
+    """Latest keyframe at or before t (t itself when there are none)"""
+    i = bisect_right(keyframes, t)
+    return keyframes[i - 1] if i else t
+
+
+def backdrop_window(path, start=None, length=32, rng=random, build_proxy=BUILD_PROXIES, use_chunks=True):
+    """(video_path, clip_start, clip_end) for a `length`-second backdrop window.
+
+    start=None picks a random window: a whole pre-cut chunk when the backdrop has
+    a chunk library of that length, otherwise a random keyframe that leaves room
+    for the window. The window starts on a keyframe so opening it decodes no
+    frames before clip_start, and comes from the proxy when one exists.
+    """
+    if start is None and use_chunks:
+        chunks = backdrop_chunks(path, length)
+        if chunks:
+            return rng.choice(chunks), 0, length
+
+    info = backdrop_info(path, build_proxy=build_proxy)
+    if 'proxy' in info:
+        path, info = info['proxy'], info['proxy_info']
+
+    duration = info['duration']
+    if duration <= length:
+        return path, 0, duration
+
+    keyframes = info['keyframes']
+    if start is None:
+        candidates = keyframes[:bisect_right(keyframes, duration - length)]
+        start = rng.choice(candidates) if candidates else rng.uniform(0, duration - length)
+    else:
+        start = _snap(keyframes, min(start, duration - length))
+    return path, start, start + length
+
+
+if __name__ == "__main__":
+    # Ingest every backdrop: python backdrops.py [--proxy] [--chunks]
+    build = "--proxy" in sys.argv[1:]
+    for name in list_backdrops():
+        path = os.path.join(BACKDROP_DIR, name)
+        info = backdrop_info(path, build_proxy=build)
+        print(f"{name}: {info['duration']:.1f}s {info['width']}x{info['height']} @ {info['fps'] or 0:.2f}fps, "
+              f"{len(info['keyframes'])} keyframes" + (f", proxy {info['proxy']}" if 'proxy' in info else ""))
+        if "--chunks" in sys.argv[1:]:
+            entry = build_chunks(path)
+            print(f"{name}: {len(entry['chunks'])} chunks of {entry['length']}s in {CHUNK_ROOT}")
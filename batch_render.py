@@ -0,0 +1,189 @@
+import os
+import time
+import multiprocessing
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from generate_video import generate_video, build_caption_words, compose_video
+from captions import save_glyphs, load_glyphs, caption_font_size, caption_stroke_width
+from ffmpeg_render import probe_video, write_ass_captions
+from encoding_profiles import get_profile, output_size
+from audio_buffer import load_audio
+from timing_sources import word_timings
+from workspace import Workspace, use_workspace
+
+# --- SETTINGS ---
+CPU_COUNT = os.cpu_count() or 1
+# Render processes per batch (each one is mostly single-core Python compositing)
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", max(1, min(CPU_COUNT, 8))))
+# ffmpeg encoder threads per render process, so workers * threads stays near the core count
+FFMPEG_THREADS = int(os.environ.get("FFMPEG_THREADS", max(1, CPU_COUNT // BATCH_WORKERS)))
+
+
+def _render_item(index, params):
+    """Run one generate_video call inside a worker process"""
+    try:
+        generate_video(**params)
+        return {'index': index, 'output_video': params['output_video'], 'error': None}
+    except Exception as e:
+        traceback.print_exc()
+        return {'index': index, 'output_video': params['output_video'], 'error': f"{type(e).__name__}: {e}"}
+
+
+def _render_shared_item(index, params):
+    """Run one compose_video call on shared, prepared assets inside a worker process"""
+    stage_times = {}
+    try:
+        started = time.perf_counter()
+        glyphs = load_glyphs(params['glyphs']) if params['glyphs'] else None
+        stage_times['glyphs'] = time.perf_counter() - started
+        with Workspace("batch-item") as ws:
+            compose_video(params['video_path'], params['audio_file'], params['output_video'], params['caption_words'],
+                          params['clip_start'], params['clip_end'], params['threads'], ws, params['backend'],
+                          params['profile'], glyphs=glyphs, subtitles=params['subtitles'], stage_times=stage_times)
+        error = None
+    except Exception as e:
+        traceback.print_exc()
+        error = f"{type(e).__name__}: {e}"
+    return {'index': index, 'output_video': params['output_video'], 'error': error, 'stage_times': stage_times}
+
+
+def render_batch(items, workers=BATCH_WORKERS, ffmpeg_threads=FFMPEG_THREADS, on_result=None, task=_render_item):
+    """Render generate_video keyword sets in parallel processes.
+
+    `items` may be a generator: each item is submitted as soon as it is produced,
+    so rendering starts while later items are still being prepared. A failing item
+    is reported in its result and does not stop the rest of the batch. Results are
+    returned in submission order; on_result(result) is called as each one finishes,
+    from a pool thread, even while `items` is still waiting for its next item.
+    task(index, params) runs each item in its worker (default: generate_video).
+    """
+    # spawn keeps torch/CUDA state and the Flask job threads out of the children
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    lock = threading.Lock()
+
+    def finished(index, params, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            # The worker process itself died (e.g. out of memory)
+            result = {'index': index, 'output_video': params['output_video'], 'error': f"{type(e).__name__}: {e}"}
+        with lock:
+            results[result['index']] = result
+            if on_result:
+                on_result(result)
+
+    # Leaving the block waits for every render, and so for every callback
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        for index, params in enumerate(items):
+            params = dict(params)
+            params.setdefault('threads', ffmpeg_threads)
+            future = executor.submit(task, index, params)
+            future.add_done_callback(lambda future, index=index, params=params: finished(index, params, future))
+
+    return [results[i] for i in sorted(results)]
+
+
+# --- One voice track, many videos ---
+def render_shared_audio(audio, script, items, backend='moviepy', profile=None, word_timestamps=None,
+                        workers=BATCH_WORKERS, ffmpeg_threads=FFMPEG_THREADS, on_result=None, workspace=None):
+    """Render many videos over one voice track, paying for the shared work once.
+
+    audio (a path or AudioBuffer) speaking `script` is decoded and written for the
+    workers once, and word-timed once (timing_sources, unless word_timestamps is
+    given). Captions are laid out and rasterized once per distinct caption script
+    and frame size, so workers only open their backdrop window and encode. Items
+    are dicts with video_path, output_video, clip_start, clip_end and optionally
+    script, the captions to show (default `script`); like render_batch they may
+    come from a generator.
+
+    Returns (results, stage_times). stage_times maps each stage to
+    {'seconds': total, 'runs': count}: audio, timings and captions are shared,
+    glyphs (loading the rasterized captions), window and encode run per video.
+    """
+    encoding = get_profile(profile)
+    stage_times = {}
+    # Shared stages are recorded here, per-video ones from render_batch's result callbacks
+    stage_lock = threading.Lock()
+
+    def record(stage, seconds):
+        with stage_lock:
+            entry = stage_times.setdefault(stage, {'seconds': 0.0, 'runs': 0})
+            entry['seconds'] += seconds
+            entry['runs'] += 1
+
+    ws, owned = use_workspace(workspace, "batch-shared")
+    try:
+        started = time.perf_counter()
+        audio = load_audio(audio)
+        # Workers are separate processes: one lossless file they all read
+        audio_file = audio.write(ws.file("voice.wav"))
+        record('audio', time.perf_counter() - started)
+
+        started = time.perf_counter()
+        if word_timestamps is None:
+            word_timestamps, _ = word_timings(audio, script)
+        record('timings', time.perf_counter() - started)
+
+        layouts = {}  # caption script -> caption words
+        sizes = {}  # video path -> source size
+        rasterized = {}  # (caption script, size) -> glyphs or subtitles path
+
+        def prepared_items():
+            for item in items:
+                caption_script = item.get('script') or script
+                if item['video_path'] not in sizes:
+                    sizes[item['video_path']] = probe_video(item['video_path'])
+                size = sizes[item['video_path']]
+
+                key = (caption_script, size)
+                if key not in rasterized:
+                    started = time.perf_counter()
+                    if caption_script not in layouts:
+                        layouts[caption_script] = build_caption_words(caption_script, word_timestamps)
+                    name = f"captions_{len(rasterized)}"
+                    if backend == 'ffmpeg':
+                        # libass scales the layout to the output frame
+                        rasterized[key] = write_ass_captions(layouts[caption_script], ws.file(f"{name}.ass"), size)
+                    else:
+                        scale = output_size(encoding, size)[1] / size[1]
+                        rasterized[key] = save_glyphs([word for word, _, _ in layouts[caption_script]],
+                                                      ws.file(f"{name}.npz"),
+                                                      font_size=caption_font_size(scale),
+                                                      stroke_width=caption_stroke_width(scale))
+                    record('captions', time.perf_counter() - started)
+
+                params = dict(
+                    video_path=item['video_path'],
+                    output_video=item['output_video'],
+                    clip_start=item['clip_start'],
+                    clip_end=item['clip_end'],
+                    audio_file=audio_file,
+                    caption_words=layouts[caption_script],
+                    glyphs=rasterized[key] if backend != 'ffmpeg' else None,
+                    subtitles=rasterized[key] if backend == 'ffmpeg' else None,
+                    backend=backend,
+                    profile=encoding,
+                )
+                if 'threads' in item:
+                    params['threads'] = item['threads']
+                yield params
+
+        def on_item(result):
+            for stage, seconds in result.pop('stage_times', {}).items():
+                record(stage, seconds)
+            if on_result:
+                on_result(result)
+
+        results = render_batch(prepared_items(), workers, ffmpeg_threads, on_item, task=_render_shared_item)
+    finally:
+        if owned:
+            ws.cleanup()
+    return results, stage_times
+
+
+def print_stage_times(stage_times):
+    """Per-stage totals of render_shared_audio, one line per stage"""
+    for stage, entry in stage_times.items():
+        print(f"{stage:<9} {entry['seconds']:7.2f}s over {entry['runs']} run(s)")
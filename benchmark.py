@@ -0,0 +1,783 @@
+"""Performance checks for the video pipeline.
+
+Run one with `python benchmark.py <name>`; `python benchmark.py -h` lists them.
+A check exits non-zero when it misses its budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+# --- Startup ---
+def bench_startup(args):
+    """Time a cold `import <module>` in a fresh interpreter"""
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {args.module}'], check=True)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"import {args.module}: best {best:.2f}s, worst {max(timings):.2f}s over {args.runs} runs "
+          f"(budget {args.budget:.1f}s)")
+    if best > args.budget:
+        print(f"❌ import {args.module} is over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+# --- Encoding profiles ---
+def bench_profiles(args):
+    """Render the same clip with every encoding profile and report time and size"""
+    from generate_video import generate_video
+    from encoding_profiles import PROFILES
+    from workspace import Workspace
+
+    with open(args.script, encoding='utf-8') as f:
+        script = f.read()
+
+    print(f"{'profile':<10}{'wall time':>12}{'file size':>14}")
+    with Workspace("bench-profiles") as ws:
+        for name in args.profiles or PROFILES:
+            output = ws.file(f"{name}.mp4")
+            start = time.perf_counter()
+            generate_video(
+                video_path=args.backdrop,
+                output_video=output,
+                script=script,
+                audio_path=args.audio,
+                clip_start=args.start,
+                clip_end=args.start + args.length,
+                # Skip Whisper unless asked, so only rendering is measured
+                word_timestamps=None if args.whisper else [],
+                workspace=ws,
+                backend=args.backend,
+                profile=name
+            )
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10}{elapsed:>11.1f}s{os.path.getsize(output) / 1e6:>12.2f}MB")
+    return 0
+
+
+# --- Voices ---
+def bench_voices(args):
+    """Script-to-audio time of create_ai_voices against the serial cost of its lines"""
+    import create_raw_voices
+    from create_raw_voices import create_ai_voices
+    from workspace import Workspace
+
+    script = "\n".join(
+        f"[{'Boy' if i % 2 == 0 else 'Girl'}] line number {i} of the benchmark conversation"
+        for i in range(args.lines)
+    )
+    with Workspace("bench-voices") as ws:
+        start = time.perf_counter()
+        audio_file, _ = create_ai_voices(script, output_file=ws.file("voices.mp3"), workspace=ws,
+                                         backend=args.backend)
+        elapsed = time.perf_counter() - start
+    if not audio_file:
+        print("❌ Synthesis failed")
+        return 1
+
+    print(f"{args.lines} lines with {args.backend}: {elapsed:.2f}s "
+          f"({create_raw_voices.TTS_WORKERS} workers)")
+    if args.backend == 'stub':
+        # Stub lines cost a fixed latency each, so the serial time is known
+        serial = args.lines * create_raw_voices.STUB_TTS_LATENCY
+        print(f"serial synthesis would take at least {serial:.2f}s")
+    return 0
+
+
+def bench_synthcache(args):
+    """Lines synthesized and time per run of synthesize_conversation with the synthesis cache"""
+    import numpy as np
+    import create_raw_voices
+    from create_raw_voices import synthesize_conversation
+
+    synthesized = []
+    stub = create_raw_voices.TTS_BACKENDS['stub']
+
+    def counting_stub(text):
+        synthesized.append(text)
+        return stub(text)
+
+    run = int(time.time())  # keeps this run's lines apart from earlier runs
+    lines = [f"[{'Boy' if i % 2 == 0 else 'Girl'}] line number {i} of cache run {run}" for i in range(args.lines)]
+    edited = list(lines)
+    edited[args.lines // 2] += " edited"
+    create_raw_voices.TTS_BACKENDS['stub'] = counting_stub
+    try:
+        audios = {}
+        expected = {'cold': args.lines, 'warm': 0, 'edited': 1}
+        failed = False
+        for name, script in (('cold', lines), ('warm', lines), ('edited', edited)):
+            synthesized.clear()
+            start = time.perf_counter()
+            audios[name], _ = synthesize_conversation("\n".join(script), backend='stub')
+            elapsed = time.perf_counter() - start
+            print(f"{name:<7} {elapsed:6.2f}s, {len(synthesized)} of {args.lines} lines synthesized")
+            failed |= len(synthesized) != expected[name]
+    finally:
+        create_raw_voices.TTS_BACKENDS['stub'] = stub
+
+    failed |= not np.array_equal(audios['cold'].samples, audios['warm'].samples)
+    if failed:
+        print("❌ Cached lines were synthesized again, or the cached track differs")
+        return 1
+    print("✅ Unchanged lines came from the cache; the edit cost one line")
+    return 0
+
+
+# --- Voice effects ---
+def _test_voice(sample_rate, seconds=5.0):
+    """Speech-like test signal: a gliding buzz with syllable-rate bursts and breath noise"""
+    import numpy as np
+    from audio_buffer import AudioBuffer
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    rng = np.random.default_rng(0)
+    buzz = 0.3 * np.sin(2 * np.pi * 180 * t * (1 + 0.3 * np.sin(2 * np.pi * 0.5 * t)))
+    noise = 0.05 * rng.standard_normal(len(t))
+    return AudioBuffer((buzz + noise) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)), sample_rate)
+
+
+def _mean_spectrum_db(samples, sample_rate):
+    import numpy as np
+    from scipy.signal import stft
+    _, _, spectrum = stft(samples.mean(axis=1), sample_rate, nperseg=2048)
+    return 20 * np.log10(np.abs(spectrum).mean(axis=1) + 1e-9)
+
+
+def bench_effects(args):
+    """Check the NumPy effect chain against ffmpeg and time both engines"""
+    import numpy as np
+    from audio_buffer import AudioBuffer
+    from create_raw_voices import VOICE_SETTINGS, SAMPLE_RATE
+    from voice_effects import apply_effects, apply_effects_ffmpeg, parse_filter
+
+    audio = AudioBuffer.from_file(args.audio).resampled(SAMPLE_RATE) if args.audio else _test_voice(SAMPLE_RATE)
+    audio = audio.with_channels(1)
+    effects = VOICE_SETTINGS["Girl"]["effects"]
+    failed = False
+
+    # Filters are deterministic: compare sample by sample
+    filters = [e for e in effects if parse_filter(e)[0] != 'atempo']
+    difference = np.abs(apply_effects(audio, filters).samples - apply_effects_ffmpeg(audio, filters).samples).max()
+    print(f"filters: max sample difference {difference:.2e} (tolerance {args.tolerance:.0e})")
+    failed |= difference > args.tolerance
+
+    # A time-stretch picks its own splice points: compare length, loudness and spectrum
+    ours, reference = apply_effects(audio, effects), apply_effects_ffmpeg(audio, effects)
+    frames = min(ours.frames, reference.frames)
+    length_error = abs(ours.frames - reference.frames) / reference.frames
+    rms = [float(np.sqrt(np.mean(b.samples[:frames] ** 2))) for b in (ours, reference)]
+    loudness_error = abs(rms[0] - rms[1]) / rms[1]
+    spectrum_error = float(np.abs(_mean_spectrum_db(ours.samples[:frames], SAMPLE_RATE) -
+                                  _mean_spectrum_db(reference.samples[:frames], SAMPLE_RATE))[:400].mean())
+    print(f"full chain: length {length_error:.2%}, loudness {loudness_error:.2%}, "
+          f"mean spectrum {spectrum_error:.2f} dB apart")
+    failed |= length_error > 0.01 or loudness_error > 0.05 or spectrum_error > 1.0
+
+    for name, engine in (('numpy', apply_effects), ('ffmpeg', apply_effects_ffmpeg)):
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            engine(audio, effects)
+        print(f"{name:<7} {(time.perf_counter() - start) / args.runs * 1000:.1f}ms per {audio.duration:.1f}s of audio")
+
+    if failed:
+        print("❌ NumPy effects differ from ffmpeg beyond tolerance")
+        return 1
+    print("✅ NumPy effects match ffmpeg")
+    return 0
+
+
+# --- Streaming synthesis ---
+def bench_stream(args):
+    """End-to-end latency of synthesize-then-render vs rendering each sentence as it is synthesized"""
+    from create_raw_voices import _stub_line
+    from duplicate_audio import script_sentences
+    from generate_video import generate_video
+    from streaming import render_streaming
+    from alignment import even_word_timings
+    from audio_buffer import concatenate
+    from workspace import Workspace
+
+    with open(args.script, encoding='utf-8') as f:
+        script = f.read()
+    sentences = script_sentences(script)
+
+    def stub_chunks():
+        # Stand-in for XTTS: each sentence takes rtf times its own duration to synthesize
+        for sentence in sentences:
+            audio = _stub_line(sentence)
+            time.sleep(audio.duration * args.rtf)
+            yield sentence, audio
+
+    def sentence_timings(text, audio):
+        return even_word_timings(text.split(), 0.0, audio.duration)
+
+    with Workspace("bench-stream") as ws:
+        start = time.perf_counter()
+        chunks = list(stub_chunks())
+        synthesis = time.perf_counter() - start
+        audio = concatenate([a for _, a in chunks]).peak_normalized(0.9)
+        timings, elapsed = [], 0.0
+        for text, chunk in chunks:
+            timings.extend(even_word_timings(text.split(), elapsed, chunk.duration))
+            elapsed += chunk.duration
+        generate_video(
+            video_path=args.backdrop,
+            output_video=ws.file("sequential.mp4"),
+            script="\n".join(sentences),
+            audio_path=audio,
+            clip_start=args.start,
+            clip_end=args.start + audio.duration,
+            word_timestamps=timings,
+            workspace=ws,
+            backend='ffmpeg',
+            profile=args.profile
+        )
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        render_streaming(stub_chunks(), args.backdrop, ws.file("streaming.mp4"), clip_start=args.start,
+                         profile=args.profile, workspace=ws, word_timings=sentence_timings)
+        streaming = time.perf_counter() - start
+
+    print(f"{len(sentences)} sentences, {audio.duration:.1f}s of speech, synthesis at {args.rtf:.2f}x real time")
+    print(f"synthesis alone: {synthesis:.1f}s")
+    print(f"sequential: {sequential:.1f}s  streaming: {streaming:.1f}s  ({sequential / streaming:.2f}x), "
+          f"render tail after synthesis {sequential - synthesis:.1f}s -> {streaming - synthesis:.1f}s")
+    return 0
+
+
+# --- Caption alignment ---
+def bench_align(args):
+    """Alignment recovery after misrecognized runs of transcript words, and matching time"""
+    from alignment import WordIndex, match_words
+
+    failed = False
+    for garbled in range(1, args.max_run + 1):
+        words = [f"w{i}" for i in range(args.words)]
+        start = args.words // 4
+        transcript = [{'word': f"x{i}" if start <= i < start + garbled else word, 'start': i * 0.3,
+                       'end': i * 0.3 + 0.25} for i, word in enumerate(words)]
+        matches = match_words(words, WordIndex(transcript))
+        expected = [None if start <= i < start + garbled else i for i in range(args.words)]
+        if matches != expected:
+            print(f"❌ {garbled} garbled words at w{start}: matched {matches}")
+            failed = True
+
+    words = [f"w{i % 50}" for i in range(args.lines * 10)]
+    transcript = [{'word': word, 'start': i * 0.3, 'end': i * 0.3 + 0.25} for i, word in enumerate(words)]
+    start = time.perf_counter()
+    matches = match_words(words, WordIndex(transcript))
+    elapsed = time.perf_counter() - start
+    print(f"matched {sum(m is not None for m in matches)} of {len(words)} words in {elapsed * 1000:.1f}ms")
+    failed |= matches != list(range(len(words)))
+    if failed:
+        print("❌ Alignment did not recover")
+        return 1
+    print(f"✅ Alignment recovers after up to {args.max_run} garbled words")
+    return 0
+
+
+# --- Word timing sources ---
+def _timed_speech(script, sample_rate=16000, seed=0):
+    """(AudioBuffer, true word timings, per-line even-split timings) of a buzz per script word.
+
+    Word lengths follow their vowel groups with random spread; words in a line are
+    mostly run together and lines end in a pause, like synthesized speech.
+    """
+    import numpy as np
+    from audio_buffer import AudioBuffer
+    from timing_sources import script_words, _word_weight
+
+    rng = np.random.default_rng(seed)
+    parts, truth, even = [], [], []
+    elapsed = 0.0
+    for line_number, line in enumerate(l for l in script.strip().split('\n') if l.strip()):
+        line_start = elapsed
+        words = script_words(line)
+        for word in words:
+            length = 0.12 * _word_weight(word) * rng.uniform(0.7, 1.3)
+            gap = rng.choice([0.02, 0.03, 0.15], p=[0.45, 0.4, 0.15])
+            t = np.arange(int(length * sample_rate)) / sample_rate
+            buzz = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 220) * t) * np.hanning(len(t)) ** 0.2
+            parts += [buzz, np.zeros(int(gap * sample_rate))]
+            truth.append({'word': word, 'start': elapsed, 'end': elapsed + length})
+            elapsed += (len(t) + int(gap * sample_rate)) / sample_rate
+        parts.append(np.zeros(int(0.3 * sample_rate)))
+        elapsed += int(0.3 * sample_rate) / sample_rate
+        step = (elapsed - line_start) / len(words)
+        even += [{'word': w, 'start': line_start + i * step, 'end': line_start + (i + 1) * step, 'line': line_number}
+                 for i, w in enumerate(words)]
+    samples = np.concatenate(parts) + 0.001 * rng.standard_normal(sum(len(p) for p in parts))
+    return AudioBuffer(samples, sample_rate), truth, even
+
+
+def bench_timing(args):
+    """Accuracy and cost of each word timing source against known word positions.
+
+    With --audio the reference is real speech: hand-labelled timings (--labels,
+    a JSON list of {'word', 'start', 'end'} per script word) or Whisper's, aligned
+    to the script. Otherwise it is a synthetic clip whose word positions are known.
+    """
+    import json
+    import numpy as np
+    from alignment import align_words
+    from audio_buffer import load_audio
+    from timing_sources import TIMING_SOURCES, TIMING_MAX_ERROR, TIMING_AUTO_SOURCES, script_words
+
+    with open(args.script, encoding='utf-8') as f:
+        script = f.read()
+    words = script_words(script)
+    reference = None
+    if args.audio:
+        audio, even = load_audio(args.audio), None
+        if args.labels:
+            with open(args.labels, encoding='utf-8') as f:
+                truth = json.load(f)
+            reference = 'labels'
+        elif args.whisper:
+            transcript, _ = TIMING_SOURCES['whisper'](audio, words)
+            truth = [{'word': word, 'start': start, 'end': end}
+                     for word, (start, end) in zip(words, align_words(words, transcript))]
+            reference = 'whisper'
+        else:
+            print("❌ --audio needs a reference: --labels file.json or --whisper")
+            return 1
+    else:
+        audio, truth, even = _timed_speech(script)
+        print("Synthetic clip: its words follow the energy aligner's own model, so this "
+              "does not validate the estimates on real speech (use --audio)")
+    max_error = TIMING_MAX_ERROR if args.max_error is None else args.max_error
+    failed = False
+    chosen = None
+    print(f"{len(words)} words, {audio.duration:.1f}s of audio")
+    for name, source in TIMING_SOURCES.items():
+        if name == 'whisper' and (not args.whisper or reference == 'whisper'):
+            continue
+        start = time.perf_counter()
+        result = source(audio, words, known=even)
+        seconds = time.perf_counter() - start
+        if result is None:
+            print(f"{name:<8} {seconds * 1000:8.1f}ms  no timings for this audio")
+            continue
+        timings, estimate = result
+        if chosen is None and estimate <= max_error and name in TIMING_AUTO_SOURCES:
+            chosen = name
+        if len(timings) == len(truth):
+            error = float(np.mean([abs(t['start'] - w['start']) for t, w in zip(timings, truth)]))
+            # An estimate far below the real error would let a bad source through
+            underestimated = error > max(2 * estimate, estimate + 0.05)
+            failed |= underestimated
+            verdict = "underestimated" if underestimated else "ok"
+            print(f"{name:<8} {seconds * 1000:8.1f}ms  mean start error {error:.3f}s, "
+                  f"estimated {estimate:.3f}s ({verdict})")
+        else:
+            print(f"{name:<8} {seconds * 1000:8.1f}ms  {len(timings)} words, estimated {estimate:.3f}s")
+
+    print(f"auto ({','.join(TIMING_AUTO_SOURCES)}) picks {chosen or 'whisper'} at max error {max_error:.2f}s")
+    if failed:
+        print("❌ A timing source underestimates its error")
+        return 1
+    print("✅ Error estimates hold")
+    return 0
+
+
+# --- Shared-audio batches ---
+def bench_batch(args):
+    """Wall time of a batch rendered item by item vs with the shared work done once"""
+    import random
+    from batch_render import render_batch, render_shared_audio, print_stage_times
+    from backdrops import backdrop_window
+    from workspace import Workspace
+
+    with open(args.script, encoding='utf-8') as f:
+        script = f.read()
+    rng = random.Random(0)
+    windows = [backdrop_window(args.backdrop, length=args.length, rng=rng) for _ in range(args.count)]
+
+    with Workspace("bench-batch") as ws:
+        start = time.perf_counter()
+        results = render_batch((dict(video_path=video_path, output_video=ws.file(f"each_{i}.mp4"), script=script,
+                                     audio_path=args.audio, clip_start=clip_start, clip_end=clip_end,
+                                     backend=args.backend, profile=args.profile)
+                                for i, (video_path, clip_start, clip_end) in enumerate(windows)),
+                               workers=args.workers)
+        each = time.perf_counter() - start
+        failed = [r for r in results if r['error']]
+
+        start = time.perf_counter()
+        results, stage_times = render_shared_audio(
+            args.audio, script,
+            (dict(video_path=video_path, output_video=ws.file(f"shared_{i}.mp4"), clip_start=clip_start,
+                  clip_end=clip_end) for i, (video_path, clip_start, clip_end) in enumerate(windows)),
+            backend=args.backend, profile=args.profile, workers=args.workers, workspace=ws)
+        shared = time.perf_counter() - start
+        failed += [r for r in results if r['error']]
+
+    print(f"{args.count} videos, {args.backend} backend, {args.profile} profile, {args.workers} workers")
+    print_stage_times(stage_times)
+    print(f"item by item: {each:.1f}s  shared: {shared:.1f}s  ({each / shared:.2f}x)")
+    if failed:
+        print(f"❌ {len(failed)} renders failed")
+        return 1
+    return 0
+
+
+# --- Script prefetch ---
+def bench_scripts(args):
+    """Wait per script taken from a warm prefetch pool vs generating each one on demand"""
+    from create_raw_voices import generate_viral_conversation
+    from script_pool import ScriptPool, StubGenerativeModel
+
+    model = StubGenerativeModel(latency=args.latency)
+    results = {}
+    for name, size in (('on demand', 0), ('pool', args.size)):
+        pool = ScriptPool(lambda: generate_viral_conversation(model=model), size=size, workers=args.workers,
+                          rate_limit=args.rate)
+        pool.start()
+        # The pool warms while the app starts up
+        time.sleep(args.warmup if size else 0)
+        waits = []
+        for _ in range(args.takes):
+            start = time.perf_counter()
+            if not pool.take():
+                print("❌ No script")
+                return 1
+            waits.append(time.perf_counter() - start)
+            time.sleep(args.interval)  # the render between two takes
+        pool.stop()
+        results[name] = waits
+        print(f"{name:<10} mean wait {sum(waits) / len(waits):.2f}s, worst {max(waits):.2f}s "
+              f"over {args.takes} takes ({pool.stats})")
+    return 0
+
+
+# --- LLM client ---
+def _fake_gemini(latency, fail_every):
+    """Local HTTP server answering Gemini REST generateContent calls; every fail_every-th one gets a 503"""
+    import json
+    import threading
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    state = {'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            with lock:
+                state['requests'] += 1
+                number = state['requests']
+            time.sleep(latency)
+            if fail_every and number % fail_every == 0:
+                self._reply(503, {'error': {'code': 503, 'message': 'fake overload', 'status': 'UNAVAILABLE'}})
+                return
+            prompt = ' '.join(part.get('text', '') for content in body.get('contents', [])
+                              for part in content.get('parts', []))
+            text = f"[Boy] Request {number}, no cap.\n[Girl] Wait what?"
+            self._reply(200, {
+                'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'},
+                                'finishReason': 'STOP', 'index': 0}],
+                'usageMetadata': {'promptTokenCount': len(prompt.split()), 'candidatesTokenCount': len(text.split()),
+                                  'totalTokenCount': len(prompt.split()) + len(text.split())},
+            })
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def bench_llm(args):
+    """Shared LLM client against a local fake Gemini: latency, retries, tokens and cache replays"""
+    from concurrent.futures import ThreadPoolExecutor
+    import llm_client
+
+    server, state = _fake_gemini(args.latency, args.fail_every)
+    # The fake server ignores the key, but the client will not run without one
+    llm_client.GOOGLE_API_KEY = llm_client.GOOGLE_API_KEY or "benchmark"
+    llm_client.set_endpoint(f"http://127.0.0.1:{server.server_address[1]}")
+    run = time.time()  # keeps this run's cache entries apart from earlier runs
+    failed = False
+    try:
+        for name, use_cache in (('live', False), ('recorded', True), ('replayed', True)):
+            before, requests_before = llm_client.counters(), state['requests']
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                texts = list(pool.map(lambda i: llm_client.generate_text(f"bench prompt {i}", variant=(run, i),
+                                                                          use_cache=use_cache),
+                                      range(args.requests)))
+            seconds = time.perf_counter() - start
+            after = llm_client.counters()
+            served = sum(1 for t in texts if t)
+            print(f"{name:<9} {seconds:6.2f}s for {args.requests} prompts, {served} answered, "
+                  f"{state['requests'] - requests_before} server requests, "
+                  f"{after['retries'] - before['retries']} retries, {after['cache_hits'] - before['cache_hits']} cache hits")
+            failed |= served < args.requests
+        failed |= state['requests'] > args.requests * 2  # replays must not reach the server
+    finally:
+        server.shutdown()
+        llm_client.set_endpoint(None)
+
+    totals = llm_client.counters()
+    print(f"mean latency {totals['mean_latency_seconds'] * 1000:.0f}ms (max {totals['max_latency_seconds'] * 1000:.0f}ms), "
+          f"{totals['prompt_tokens']} prompt + {totals['output_tokens']} output tokens")
+    if failed:
+        print("❌ Prompts went unanswered or replays reached the server")
+        return 1
+    print("✅ All prompts answered; replays served from the cache")
+    return 0
+
+
+# --- Script parser ---
+def _fuzz_script(rng, lines):
+    """Random script text with the things real scripts get wrong: emoji, SFX tags, stray brackets, CRLF"""
+    words = ["bruh", "wait", "what?", "no", "cap", "CRIME!", "it's", "...", "-", "pizza,", "ça", "naïve",
+             "100%", "😱", "🍕👍🏽", "[SFX: gasp]", "[laughs]", "[", "]", "[Boy", "don't!!", "\t", "x]y"]
+    speakers = ["[Boy] ", "[Girl] ", "[] ", "[SFX: laugh] ", "", "  [Boy]", "[Narrator]  "]
+    out = []
+    for _ in range(lines):
+        if rng.random() < 0.05:
+            out.append(rng.choice(["", "   ", "\r"]))
+            continue
+        out.append(rng.choice(speakers) + " ".join(rng.choice(words) for _ in range(rng.randint(0, 12))))
+    return rng.choice(["\n", "\r\n"]).join(out)
+
+
+def _legacy_parse(script):
+    """The three ad hoc parses the pipeline used to run on every script"""
+    import re
+    for line in [ln.strip() for ln in script.split('\n') if ln.strip()]:
+        re.match(r'\[(.*?)\](.*)', line)
+    for line in script.splitlines():
+        cleaned = re.sub(r"^\s*\[.*?\]\s*", "", line).strip()
+        re.split(r"(?<=[.!?])\s+", cleaned)
+    for line in script.strip().split('\n'):
+        content = line[line.find(']') + 1:].strip() if line.startswith('[') else line
+        content.split()
+
+
+def bench_script(args):
+    """Fuzz the script parser's invariants, then time it on a large script"""
+    import random
+    from alignment import normalize_word
+    from script_parser import parse_script, parse_line, _EMOJI
+
+    rng = random.Random(args.seed)
+    problems = []
+    for case in range(args.cases):
+        text = _fuzz_script(rng, rng.randint(0, 20))
+        try:
+            script = parse_script(text)
+        except Exception as e:
+            problems.append(f"case {case}: {type(e).__name__}: {e}")
+            continue
+        for line in script:
+            reparsed, _ = parse_line(0, f"[S] {line.text}")
+            checks = {
+                'display and tokens differ in length': len(line.display) != len(line.tokens),
+                'token is not the normalized word': any(normalize_word(w) != t for w, t in zip(line.display, line.tokens)),
+                'empty token': not all(line.tokens),
+                'bracket or emoji spoken': any(c in line.text for c in '[]') or bool(_EMOJI.search(line.text)),
+                'reparse changes the words': reparsed.display != line.display,
+                'sentences lose words': [t for s in line.sentences() for t in parse_line(0, s)[0].tokens] != list(line.tokens),
+            }
+            problems += [f"case {case}, {line!r}: {name}" for name, failed in checks.items() if failed]
+    print(f"fuzz: {args.cases} scripts, {len(problems)} problems")
+    for problem in problems[:10]:
+        print(f"  {problem}")
+
+    text = _fuzz_script(rng, args.lines)
+    start = time.perf_counter()
+    _legacy_parse(text)
+    legacy = time.perf_counter() - start
+    parse_script.cache_clear()
+    start = time.perf_counter()
+    script = parse_script(text)
+    parsed = time.perf_counter() - start
+    start = time.perf_counter()
+    parse_script(text)
+    cached = time.perf_counter() - start
+    print(f"{args.lines} lines, {len(script.words())} words: parse {parsed * 1000:.1f}ms "
+          f"(old ad hoc parses {legacy * 1000:.1f}ms), cached {cached * 1e6:.0f}us")
+    if problems:
+        print("❌ Parser invariants broken")
+        return 1
+    print("✅ Parser invariants hold")
+    return 0
+
+
+# --- Backdrop chunks ---
+def bench_backdrop(args):
+    """Per-video render time from a random subclip of the full backdrop vs a pre-cut chunk"""
+    import random
+    from generate_video import generate_video
+    from backdrops import backdrop_info, backdrop_chunks, backdrop_window, build_chunks
+    from workspace import Workspace
+
+    with open(args.script, encoding='utf-8') as f:
+        script = f.read()
+    if not backdrop_chunks(args.backdrop, args.length):
+        build_chunks(args.backdrop, length=args.length)
+    duration = backdrop_info(args.backdrop, build_proxy=False)['duration']
+    rng = random.Random(0)
+
+    def subclip_window():
+        # The pre-index path: any start time on the source file
+        start = rng.uniform(0, max(0.0, duration - args.length))
+        return args.backdrop, start, start + args.length
+
+    def chunk_window():
+        return backdrop_window(args.backdrop, length=args.length, rng=rng)
+
+    averages = {}
+    with Workspace("bench-backdrop") as ws:
+        for name, window in (('subclip', subclip_window), ('chunk', chunk_window)):
+            timings = []
+            for run in range(args.runs):
+                video_path, clip_start, clip_end = window()
+                start = time.perf_counter()
+                generate_video(
+                    video_path=video_path,
+                    output_video=ws.file(f"{name}_{run}.mp4"),
+                    script=script,
+                    audio_path=args.audio,
+                    clip_start=clip_start,
+                    clip_end=clip_end,
+                    word_timestamps=[],
+                    workspace=ws,
+                    backend=args.backend,
+                    profile=args.profile
+                )
+                timings.append(time.perf_counter() - start)
+            averages[name] = sum(timings) / len(timings)
+            print(f"{name:<8} {averages[name]:.1f}s per video over {args.runs} runs")
+
+    print(f"chunk library speedup: {averages['subclip'] / averages['chunk']:.2f}x")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    startup = commands.add_parser('startup', help='cold import time of the web app')
+    startup.add_argument('--module', default='main')
+    startup.add_argument('--budget', type=float, default=15.0, help='seconds allowed for the import')
+    startup.add_argument('--runs', type=int, default=3)
+    startup.set_defaults(func=bench_startup)
+
+    profiles = commands.add_parser('profiles', help='wall time and file size per encoding profile')
+    profiles.add_argument('--backdrop', default='downloads/subway_surfer.mp4')
+    profiles.add_argument('--audio', default='audios/final_output.wav')
+    profiles.add_argument('--script', default='temp_script.txt', help='file with the [Speaker] script')
+    profiles.add_argument('--start', type=float, default=10.0)
+    profiles.add_argument('--length', type=float, default=32.0)
+    profiles.add_argument('--backend', choices=['moviepy', 'ffmpeg'], default='moviepy')
+    profiles.add_argument('--profiles', nargs='+', help='default: all profiles')
+    profiles.add_argument('--whisper', action='store_true', help='include Whisper alignment in the timing')
+    profiles.set_defaults(func=bench_profiles)
+
+    voices = commands.add_parser('voices', help='script-to-audio time of create_ai_voices')
+    voices.add_argument('--backend', choices=['gtts', 'stub'], default='stub')
+    voices.add_argument('--lines', type=int, default=8)
+    voices.set_defaults(func=bench_voices)
+
+    synthcache = commands.add_parser('synthcache', help='lines synthesized per run with the synthesis cache (stub TTS)')
+    synthcache.add_argument('--lines', type=int, default=8)
+    synthcache.set_defaults(func=bench_synthcache)
+
+    effects = commands.add_parser('effects', help='NumPy voice effects vs ffmpeg: equivalence and time')
+    effects.add_argument('--audio', help='voice recording to test with (default: synthetic)')
+    effects.add_argument('--tolerance', type=float, default=1e-3, help='max sample difference for the filters')
+    effects.add_argument('--runs', type=int, default=5)
+    effects.set_defaults(func=bench_effects)
+
+    stream = commands.add_parser('stream', help='latency of streaming sentence synthesis into the render')
+    stream.add_argument('--backdrop', default='downloads/subway_surfer.mp4')
+    stream.add_argument('--script', default='temp_script.txt', help='file with the [Speaker] script')
+    stream.add_argument('--start', type=float, default=10.0)
+    stream.add_argument('--rtf', type=float, default=0.5, help='stub synthesis seconds per second of speech')
+    stream.add_argument('--profile', default='publish')
+    stream.set_defaults(func=bench_stream)
+
+    align = commands.add_parser('align', help='caption alignment recovery after garbled transcript runs')
+    align.add_argument('--words', type=int, default=30, help='script words per recovery case')
+    align.add_argument('--max-run', type=int, default=20, help='longest garbled run to check')
+    align.add_argument('--lines', type=int, default=2000, help='lines of 10 words in the timed script')
+    align.set_defaults(func=bench_align)
+
+    timing = commands.add_parser('timing', help='accuracy and cost of each word timing source')
+    timing.add_argument('--script', default='temp_script.txt', help='file with the [Speaker] script')
+    timing.add_argument('--max-error', type=float, default=None, help='default: TIMING_MAX_ERROR')
+    timing.add_argument('--whisper', action='store_true', help='include Whisper (loads the model)')
+    timing.add_argument('--audio', help='real synthesized clip of --script (default: synthetic)')
+    timing.add_argument('--labels', help='hand-labelled word timings of --audio (JSON)')
+    timing.set_defaults(func=bench_timing)
+
+    batch = commands.add_parser('batch', help='batch render time with and without shared audio, timings and captions')
+    batch.add_argument('--backdrop', default='downloads/subway_surfer.mp4')
+    batch.add_argument('--audio', default='audios/final_output.wav')
+    batch.add_argument('--script', default='temp_script.txt', help='file with the [Speaker] script')
+    batch.add_argument('--count', type=int, default=4)
+    batch.add_argument('--length', type=int, default=32)
+    batch.add_argument('--workers', type=int, default=2)
+    batch.add_argument('--backend', choices=['moviepy', 'ffmpeg'], default='moviepy')
+    batch.add_argument('--profile', default='draft')
+    batch.set_defaults(func=bench_batch)
+
+    scripts = commands.add_parser('scripts', help='script wait with and without the prefetch pool (stub model)')
+    scripts.add_argument('--latency', type=float, default=1.0, help='stub seconds per request')
+    scripts.add_argument('--takes', type=int, default=10)
+    scripts.add_argument('--interval', type=float, default=0.5, help='seconds between takes')
+    scripts.add_argument('--size', type=int, default=8)
+    scripts.add_argument('--workers', type=int, default=2)
+    scripts.add_argument('--rate', type=float, default=600, help='requests per minute')
+    scripts.add_argument('--warmup', type=float, default=5.0, help='seconds the pool fills before the first take')
+    scripts.set_defaults(func=bench_scripts)
+
+    llm = commands.add_parser('llm', help='shared LLM client against a local fake Gemini server')
+    llm.add_argument('--requests', type=int, default=20)
+    llm.add_argument('--threads', type=int, default=8)
+    llm.add_argument('--latency', type=float, default=0.2, help='fake server seconds per request')
+    llm.add_argument('--fail-every', type=int, default=5, help='answer every Nth request with a 503 (0: never)')
+    llm.set_defaults(func=bench_llm)
+
+    script = commands.add_parser('script', help='fuzz the script parser and time it on a large script')
+    script.add_argument('--cases', type=int, default=2000)
+    script.add_argument('--lines', type=int, default=20000, help='lines in the timed script')
+    script.add_argument('--seed', type=int, default=0)
+    script.set_defaults(func=bench_script)
+
+    backdrop = commands.add_parser('backdrop', help='render time from full-backdrop subclips vs pre-cut chunks')
+    backdrop.add_argument('--backdrop', default='downloads/subway_surfer.mp4')
+    backdrop.add_argument('--audio', default='audios/final_output.wav')
+    backdrop.add_argument('--script', default='temp_script.txt', help='file with the [Speaker] script')
+    backdrop.add_argument('--length', type=int, default=32)
+    backdrop.add_argument('--runs', type=int, default=3)
+    backdrop.add_argument('--backend', choices=['moviepy', 'ffmpeg'], default='moviepy')
+    backdrop.add_argument('--profile', default='publish')
+    backdrop.set_defaults(func=bench_backdrop)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from moviepy import TextClip
+
+# --- Caption styling ---
+HIGHLIGHT_FONT_SIZE = 32
+BOY_COLOR = '#FFFFFF'
+GIRL_COLOR = '#FFFFFF'
+STROKE_COLOR = 'black'
+STROKE_WIDTH = 3
+TEXT_POSITION = ('center', 'center')
+TEXT_BOX_SIZE = (300, 300)
+FONT = 'fonts/Luckiest_Guy/LuckiestGuy-Regular.ttf'
+
+
+def create_text_clip(text, start_time, duration):
+    """Single caption word, centered on the frame for `duration` seconds"""
+    return (TextClip(
+        text=text,
+        font_size=HIGHLIGHT_FONT_SIZE,
+        color=BOY_COLOR,
+        stroke_color=STROKE_COLOR,
+        stroke_width=STROKE_WIDTH,
+        method='caption',
+        size=TEXT_BOX_SIZE,
+        font=FONT
+    )
+    .with_start(start_time)
+    .with_duration(duration)
+    .with_position(TEXT_POSITION))
+
+
+# --- Pre-rendered caption track ---
+# Distinct words kept rasterized; a script rarely has more than a few hundred
+GLYPH_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=32)
+def _load_font(font, font_size):
+    return ImageFont.truetype(font, font_size)
+
+
+@lru_cache(maxsize=GLYPH_CACHE_SIZE)
+def render_word(text, font=FONT, font_size=HIGHLIGHT_FONT_SIZE, color=BOY_COLOR,
+                stroke_color=STROKE_COLOR, stroke_width=STROKE_WIDTH):
+    """Rasterize one caption word once; returns (premultiplied RGB, alpha) float32 arrays"""
+    pil_font = _load_font(font, font_size)
+    left, top, right, bottom = pil_font.getbbox(text, stroke_width=stroke_width)
+    image = Image.new('RGBA', (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text((-left, -top), text, font=pil_font, fill=color,
+                               stroke_width=stroke_width, stroke_fill=stroke_color)
+    rgba = np.asarray(image, dtype=np.float32) / 255.0
+    alpha = rgba[:, :, 3:4]
+    rgb = rgba[:, :, :3] * alpha * 255.0
+    # Shared between frames and renders through the cache, so never let callers modify them
+    rgb.flags.writeable = False
+    alpha.flags.writeable = False
+    return rgb, alpha
+
+
+def caption_font_size(scale=1.0):
+    """Caption font size for a frame scaled by `scale` from the source"""
+    return round(HIGHLIGHT_FONT_SIZE * scale)
+
+
+def caption_stroke_width(scale=1.0):
+    return max(1, round(STROKE_WIDTH * scale))
+
+
+# --- Glyph sets shared between processes ---
+def save_glyphs(texts, path, font=FONT, font_size=HIGHLIGHT_FONT_SIZE, color=BOY_COLOR,
+                stroke_color=STROKE_COLOR, stroke_width=STROKE_WIDTH):
+    """Rasterize every distinct word once and store them in one .npz for other renders to load"""
+    texts = sorted(set(texts))
+    arrays = {}
+    for i, text in enumerate(texts):
+        arrays[f'rgb_{i}'], arrays[f'alpha_{i}'] = render_word(text, font, font_size, color, stroke_color, stroke_width)
+    np.savez(path, texts=np.array(texts, dtype=str), **arrays)
+    return path
+
+
+def load_glyphs(path):
+    """{text: (rgb, alpha)} written by save_glyphs"""
+    with np.load(path) as data:
+        glyphs = {}
+        for i, text in enumerate(data['texts']):
+            rgb, alpha = data[f'rgb_{i}'], data[f'alpha_{i}']
+            rgb.flags.writeable = False
+            alpha.flags.writeable = False
+            glyphs[str(text)] = (rgb, alpha)
+    return glyphs
+
+
+class CaptionTrack:
+    """Caption words drawn straight onto frames, one active word at a time.
+
+    Words are sorted by start time and looked up with bisect, so the per-frame
+    cost does not grow with the number of words in the script. glyphs
+    ({text: (rgb, alpha)}, see load_glyphs) supplies words already rasterized
+    in this style; others are rendered on first use.
+    """
+
+    def __init__(self, words, font=FONT, font_size=HIGHLIGHT_FONT_SIZE, color=BOY_COLOR,
+                 stroke_color=STROKE_COLOR, stroke_width=STROKE_WIDTH, glyphs=None):
+        # words: (text, start, duration) tuples
+        words = sorted(words, key=lambda w: w[1])
+        self.texts = [text for text, _, _ in words]
+        self.starts = [start for _, start, _ in words]
+        self.ends = [start + duration for _, start, duration in words]
+        self.style = (font, font_size, color, stroke_color, stroke_width)
+        self.glyphs = glyphs or {}
+
+    def active_word(self, t):
+        """Text of the word on screen at time t, or None"""
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return self.texts[i]
+        return None
+
+    def draw(self, frame, t):
+        """Frame with the active word alpha-blended at the center"""
+        text = self.active_word(t)
+        if text is None:
+            return frame
+        glyph = self.glyphs.get(text)
+        rgb, alpha = glyph if glyph is not None else render_word(text, *self.style)
+
+        frame_h, frame_w = frame.shape[:2]
+        h, w = rgb.shape[:2]
+        y = (frame_h - h) // 2
+        x = (frame_w - w) // 2
+        # Crop the glyph to the frame if it is wider or taller
+        gy, gx = max(0, -y), max(0, -x)
+        y, x = max(0, y), max(0, x)
+        h, w = min(h - gy, frame_h - y), min(w - gx, frame_w - x)
+
+        frame = frame.copy()
+        region = frame[y:y + h, x:x + w].astype(np.float32)
+        a = alpha[gy:gy + h, gx:gx + w]
+        frame[y:y + h, x:x + w] = (rgb[gy:gy + h, gx:gx + w] + region * (1.0 - a)).astype(np.uint8)
+        return frame
+
+    def apply(self, clip):
+        """Clip with this track burned into every frame"""
+        return clip.transform(lambda get_frame, t: self.draw(get_frame(t), t))
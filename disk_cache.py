@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import tempfile
+
+# --- SETTINGS ---
+CACHE_ROOT = os.environ.get("CACHE_DIR", "cache")
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """sha256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_key(*parts):
+    """Stable key for a mix of strings, numbers, dicts and lists"""
+    return hash_bytes(json.dumps(parts, sort_keys=True, default=str).encode('utf-8'))
+
+
+class DiskCache:
+    """Directory of files keyed by hex digest, trimmed least-recently-used past max_bytes.
+
+    Entries are written to a temporary file and renamed into place, so concurrent
+    writers (threads or processes) never expose a half-written entry; the last
+    writer wins. Reads refresh the entry's mtime, which is what eviction orders by.
+    """
+
+    def __init__(self, name, max_bytes, suffix=""):
+        self.directory = os.path.join(CACHE_ROOT, name)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def touch(self, key):
+        try:
+            os.utime(self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_bytes(self, key):
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self.touch(key)
+        return data
+
+    def put_bytes(self, key, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+        return self.path_for(key)
+
+    def put_file(self, key, write):
+        """Store an entry produced by write(path), for writers that need a filename"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-', suffix=self.suffix)
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+        return self.path_for(key)
+
+    def get_path(self, key):
+        """Path of an existing entry (refreshing its recency), or None"""
+        return self.path_for(key) if self.touch(key) else None
+
+    def get_json(self, key):
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode('utf-8'))
+        except ValueError:
+            # Corrupt entry, treat as a miss
+            return None
+
+    def put_json(self, key, value):
+        return self.put_bytes(key, json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+    def evict(self):
+        """Delete the least recently used entries until the directory fits max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp-'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another process evicted it first
+            total -= size
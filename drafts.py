@@ -0,0 +1,89 @@
+"""Voice tracks and caption timings of rendered videos, kept for re-encoding.
+
+Voice cloning is stochastic, so approving a draft must not clone again: the
+publish render loads the draft's audio and word timings and only re-encodes.
+Each draft is a directory under DRAFT_DIR named by its job id; the MAX_DRAFTS
+most recently used are kept.
+"""
+import os
+import re
+import json
+import shutil
+import tempfile
+import soundfile as sf
+from audio_buffer import AudioBuffer
+
+# --- SETTINGS ---
+DRAFT_DIR = os.environ.get("DRAFT_DIR", "drafts")
+MAX_DRAFTS = int(os.environ.get("MAX_DRAFTS", 50))
+
+_DRAFT_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _draft_path(draft_id):
+    """Directory of a draft, or None for an id that is not a job id"""
+    if not isinstance(draft_id, str) or not _DRAFT_ID.fullmatch(draft_id):
+        return None
+    return os.path.join(DRAFT_DIR, draft_id)
+
+
+def save_draft(draft_id, audio, word_timestamps, **render):
+    """Keep a rendered video's voice track, word timings and render settings.
+
+    render holds what generate_video needs besides them: video_path, script,
+    clip_start, clip_end and backend.
+    """
+    path = _draft_path(draft_id)
+    if path is None:
+        raise ValueError(f"Invalid draft id: {draft_id!r}")
+    os.makedirs(DRAFT_DIR, exist_ok=True)
+    # Written aside and renamed into place, so a reader never sees half a draft
+    temp_path = tempfile.mkdtemp(prefix='.tmp-', dir=DRAFT_DIR)
+    try:
+        # 32-bit float, so the re-encode muxes exactly the samples the draft did
+        sf.write(os.path.join(temp_path, "voice.wav"), audio.samples, audio.sample_rate, subtype='FLOAT')
+        with open(os.path.join(temp_path, "draft.json"), 'w', encoding='utf-8') as f:
+            json.dump({'word_timestamps': word_timestamps, 'render': render}, f, ensure_ascii=False)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+    _prune()
+    return path
+
+
+def draft_exists(draft_id):
+    path = _draft_path(draft_id)
+    return path is not None and os.path.isfile(os.path.join(path, "draft.json"))
+
+
+def load_draft(draft_id):
+    """(AudioBuffer, word timestamps, render settings) of a saved draft, or None"""
+    path = _draft_path(draft_id)
+    if path is None:
+        return None
+    try:
+        with open(os.path.join(path, "draft.json"), encoding='utf-8') as f:
+            draft = json.load(f)
+        audio = AudioBuffer.from_file(os.path.join(path, "voice.wav"))
+        os.utime(path)  # Recently used drafts are pruned last
+    except (OSError, ValueError, RuntimeError):
+        # Pruned, or never finished writing
+        return None
+    return audio, draft['word_timestamps'], draft['render']
+
+
+def _prune():
+    """Delete the least recently used drafts beyond MAX_DRAFTS"""
+    drafts = []
+    for name in os.listdir(DRAFT_DIR):
+        if name.startswith('.tmp-'):
+            continue
+        try:
+            drafts.append((os.stat(os.path.join(DRAFT_DIR, name)).st_mtime, name))
+        except FileNotFoundError:
+            continue
+    drafts.sort(reverse=True)
+    for _, name in drafts[MAX_DRAFTS:]:
+        shutil.rmtree(os.path.join(DRAFT_DIR, name), ignore_errors=True)
@@ -1,79 +1,92 @@
-import os
-from TTS.api import TTS
-import soundfile as sf  # For reliable audio saving
-import noisereduce as nr  # Optional
-import librosa  # For audio loading and resampling
-import re
-import torch
+from workspace import use_workspace
+from script_parser import as_script
+from audio_buffer import debug_dump, concatenate
+from disk_cache import hash_file
+from synthesis_cache import line_key, get_line, put_line, synthesize_lines
+import model_registry  # XTTS is loaded on first use, or lives in the synthesis worker
 
-# --- SETUP ---
-device = "cuda" if torch.cuda.is_available() else "cpu"
-print(f"Starting duplicate_audio.py - Using device: {device}")
+REFERENCE_AUDIO = "audios/final_output.wav"  # Use the original voice
+CLONE_SETTINGS = dict(
+    language="en",
+    speed=1.1,  # Avoid speed modifications (can cause artifacts)
+    temperature=0.6,  # Lower = more stable
+    length_penalty=1.0,  # Prevents cut-offs
+)
 
-# --- LIGHTWEIGHT AUDIO PREPROCESSING ---
-def preprocess_audio(input_path, output_path):
-    try:
-        # Load audio (keep original sample rate unless >44.1kHz)
-        y, sr = librosa.load(input_path, sr=None)
-        if sr > 44100:
-            y = librosa.resample(y, orig_sr=sr, target_sr=44100)
-            sr = 44100
-        
-        # Only apply noise reduction if background noise exists
-        if len(y) > 0:
-            y = nr.reduce_noise(y=y, sr=sr, stationary=True, prop_decrease=0.5)  # Mild reduction
-        
-        # Normalize without over-driving
-        y = y * (0.9 / max(0.01, max(abs(y))))  # Safer than librosa.util.normalize
-        
-        sf.write(output_path, y, sr)
-        return output_path
-    except Exception as e:
-        print(f"Preprocessing failed: {e}")
-        return input_path  # Fallback to original
+def clone_key(text, voice, split_sentences=True):
+    """Synthesis cache key for one cloned line or sentence; voice is the reference audio's hash"""
+    settings = dict(CLONE_SETTINGS, model=model_registry.XTTS_MODEL, split_sentences=split_sentences)
+    return line_key(text, voice, settings)
+
+def clone_line(text):
+    return model_registry.synthesize(text=text, reference_audio=REFERENCE_AUDIO, split_sentences=True,
+                                     **CLONE_SETTINGS)
+
+def script_sentences(text):
+    """Spoken sentences of a script (text or Script), in order"""
+    return as_script(text).sentences()
+
+def duplicate_audio_stream(text):
+    """Yield (sentence, AudioBuffer) for each sentence of the script as soon as it is cloned.
+
+    The buffers are not normalized; the caller normalizes the joined track. Cached
+    sentences are yielded at once; the rest are streamed from one synthesis call.
+    """
+    sentences = script_sentences(text)
+    voice = hash_file(REFERENCE_AUDIO)
+    keys = [clone_key(sentence, voice, split_sentences=False) for sentence in sentences]
+    cached = [get_line(key) for key in keys]
+    missing = [sentence for sentence, audio in zip(sentences, cached) if audio is None]
+    # Lazy: nothing is synthesized until the first uncached sentence is needed
+    chunks = model_registry.synthesize_stream(sentences=missing, reference_audio=REFERENCE_AUDIO,
+                                              **CLONE_SETTINGS) if missing else iter(())
+    for sentence, key, audio in zip(sentences, keys, cached):
+        yield sentence, audio if audio is not None else put_line(key, next(chunks))
+
+def duplicate_audio(text, workspace=None, as_buffer=False):
+    """Duplicate audio based on the given text (or Script), removing speaker tags like [Boy] and [Girl].
 
-# --- INIT TTS WITH OPTIMIZED PARAMS ---
-tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(device)
+    With as_buffer=True the cloned track is returned as an AudioBuffer and nothing is
+    written. Otherwise it is written to clone.wav in `workspace`, or without one in a
+    new directory under workspaces/ that the caller removes, and the path is returned.
 
-def duplicate_audio(text):
-    """Duplicate audio based on the given text, removing speaker tags like [Boy] and [Girl]"""
+    Each script line is cloned on its own and cached (synthesis_cache.py) by its
+    text, the reference voice and CLONE_SETTINGS, so only new or edited lines are
+    synthesized.
+    """
+    ws, owned = use_workspace(workspace, "clone")
+    output_file = None
     try:
-        # Remove speaker tags (e.g., [Boy], [Girl]) from each line
-        cleaned_lines = []
-        for line in text.splitlines():
-            cleaned_line = re.sub(r"^\s*\[.*?\]\s*", "", line)
-            if cleaned_line.strip():
-                cleaned_lines.append(cleaned_line.strip())
-        cleaned_text = " ".join(cleaned_lines)
+        # Spoken text only: speaker tags, SFX markers and emoji removed
+        lines = [line.text for line in as_script(text).spoken_lines()]
+        if not lines:
+            raise ValueError("The script has nothing to say")
         
-        # Ensure audios directory exists
-        os.makedirs("audios", exist_ok=True)
+        # 1. Reference voice: cleaned copy and speaker latents are cached per file content
+        voice = hash_file(REFERENCE_AUDIO)
         
-        # 1. Preprocess reference audio (skip if it causes issues)
-        ref_audio = "audios/final_output.wav"  # Use the original voice
-        processed_audio = "audios/processed_reference.wav"
-        processed_audio = preprocess_audio(ref_audio, processed_audio)
+        # 2. Generate raw output line by line, kept in memory; XTTS runs one line at a time
+        keys = [clone_key(line, voice) for line in lines]
+        results = synthesize_lines(lines, keys, clone_line)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        raw = concatenate(results)
         
-        # 2. Generate raw output
-        output_raw = "audios/raw_output.wav"
-        tts.tts_to_file(
-            text=cleaned_text,  # Cleaned text without speaker tags
-            speaker_wav=processed_audio,
-            language="en",
-            file_path=output_raw,
-            speed=1.1,  # Avoid speed modifications (can cause artifacts)
-            temperature=0.6,  # Lower = more stable
-            length_penalty=1.0,  # Prevents cut-offs
-            split_sentences=True,
-        )
+        debug_dump(raw, ws, "raw_output.wav")
         
         # 3. Optional: Light postprocessing (only volume normalization)
-        y, sr = librosa.load(output_raw, sr=None)
-        y = y * (0.9 / max(abs(y)))  # Simple peak normalization
-        output_file = "audios/final_output_clone.wav"
-        sf.write(output_file, y, sr)
-        print("Done! Output saved to audios/final_output_clone.wav")
+        audio = raw.peak_normalized(0.9)  # Simple peak normalization
+        if as_buffer:
+            return audio
+        output_file = audio.write(ws.file("clone.wav"))
+        print(f"Done! Output saved to {output_file}")
         return output_file
     except Exception as e:
         print(f"Voice duplication failed: {e}")
+        output_file = None
         return None
+    finally:
+        # An owned workspace only outlives the call when it holds the result
+        if owned and output_file is None:
+            ws.cleanup()
@@ -0,0 +1,80 @@
+import os
+
+# --- Encoding profiles ---
+# height: output height in pixels (width follows the backdrop's aspect ratio); None keeps the source size
+# bitrate: x264 bitrate hint; with crf set, x264 still encodes in constant-quality mode
+PROFILES = {
+    # Fast look at timing and captions while iterating on a script
+    'draft': {
+        'fps': 24,
+        'preset': 'ultrafast',
+        'crf': 30,
+        'height': 640,
+        'bitrate': None,
+        'audio_bitrate': '96k',
+        'threads': 4,
+    },
+    # Good enough to approve a video before the final encode
+    'preview': {
+        'fps': 30,
+        'preset': 'veryfast',
+        'crf': 23,
+        'height': 1280,
+        'bitrate': None,
+        'audio_bitrate': '128k',
+        'threads': 8,
+    },
+    # Upload quality (the original hard-coded settings)
+    'publish': {
+        'fps': 60,
+        'preset': 'slow',
+        'crf': 18,
+        'height': None,
+        'bitrate': '8000k',
+        'audio_bitrate': '320k',
+        'threads': 8,
+    },
+}
+DEFAULT_PROFILE = os.environ.get("ENCODING_PROFILE", "publish")
+
+
+def get_profile(name=None):
+    """Copy of a named profile; raises ValueError for unknown names"""
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encoding profile '{name}', expected one of {', '.join(PROFILES)}")
+    return dict(PROFILES[name], name=name)
+
+
+def output_size(profile, source_size):
+    """(width, height) after the profile's scaling, kept even for yuv420p"""
+    width, height = source_size
+    if not profile['height'] or profile['height'] >= height:
+        return width, height
+    scaled_width = int(round(width * profile['height'] / height / 2)) * 2
+    return scaled_width, profile['height']
+
+
+def x264_params(profile):
+    """Video encoder arguments shared by the moviepy and ffmpeg backends (codec and preset excluded)"""
+    return [
+        '-crf', str(profile['crf']),
+        '-profile:v', 'high',
+        '-level', '4.2',
+        '-movflags', '+faststart',
+        '-pix_fmt', 'yuv420p'
+    ]
+
+
+def moviepy_write_kwargs(profile, threads=None):
+    """Keyword arguments for VideoClip.write_videofile"""
+    return dict(
+        fps=profile['fps'],
+        codec='libx264',
+        threads=threads or profile['threads'],
+        preset=profile['preset'],
+        bitrate=profile['bitrate'],
+        audio_codec='aac',
+        audio_bitrate=profile['audio_bitrate'],
+        ffmpeg_params=x264_params(profile),
+    )
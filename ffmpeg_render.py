@@ -0,0 +1,213 @@
+import os
+import json
+import struct
+import subprocess
+from captions import FONT, HIGHLIGHT_FONT_SIZE, STROKE_WIDTH
+from workspace import use_workspace
+from encoding_profiles import get_profile, output_size, x264_params
+
+# --- Caption style in ASS terms ---
+ASS_FONT_NAME = "Luckiest Guy"
+ASS_WHITE = "&H00FFFFFF"
+ASS_BLACK = "&H00000000"
+ASS_ALIGN_CENTER = 5  # Numpad layout: middle row, center
+
+
+def probe_video(path):
+    """(width, height) of the first video stream"""
+    result = subprocess.run([
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height',
+        '-of', 'json',
+        path
+    ], capture_output=True, text=True, check=True)
+    stream = json.loads(result.stdout)['streams'][0]
+    return int(stream['width']), int(stream['height'])
+
+
+def _ass_font_size(font_path, font_size):
+    """ASS Fontsize that draws glyphs as large as PIL does at font_size.
+
+    libass scales a font so usWinAscent + usWinDescent (OS/2 table) equals the
+    style size, while PIL's size is the em; convert between the two.
+    """
+    with open(font_path, 'rb') as f:
+        data = f.read()
+    num_tables = struct.unpack_from('>H', data, 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, _ = struct.unpack_from('>4sIII', data, 12 + 16 * i)
+        tables[tag] = offset
+    units_per_em = struct.unpack_from('>H', data, tables[b'head'] + 18)[0]
+    win_ascent, win_descent = struct.unpack_from('>HH', data, tables[b'OS/2'] + 74)
+    return round(font_size * (win_ascent + win_descent) / units_per_em)
+
+
+def _ass_time(seconds):
+    centis = int(round(max(0.0, seconds) * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def _ass_text(text):
+    # Braces open override blocks and backslashes start escapes in ASS
+    return text.replace('\\', '').replace('{', '(').replace('}', ')')
+
+
+def write_ass_captions(caption_words, path, size):
+    """Write (word, start, duration) captions as an ASS file styled like captions.py"""
+    width, height = size
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "ScaledBorderAndShadow: yes",
+        "WrapStyle: 2",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Caption,{ASS_FONT_NAME},{_ass_font_size(FONT, HIGHLIGHT_FONT_SIZE)},{ASS_WHITE},{ASS_WHITE},{ASS_BLACK},{ASS_BLACK},"
+        f"0,0,0,0,100,100,0,0,1,{STROKE_WIDTH},0,{ASS_ALIGN_CENTER},0,0,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for word, start, duration in caption_words:
+        lines.append(f"Dialogue: 0,{_ass_time(start)},{_ass_time(start + duration)},Caption,,0,0,0,,{_ass_text(word)}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def _filter_path(path):
+    """Quote a path for use as a filter option value"""
+    path = os.path.abspath(path).replace('\\', '/')
+    return path.replace(':', '\\:').replace("'", "\\'")
+
+
+def _video_filter(profile, source_size, subtitles):
+    """Filter chain for the backdrop: frame rate, progress bar, scaling and captions"""
+    width, height = output_size(profile, source_size)
+    fonts_dir = os.path.dirname(FONT)
+    filters = [
+        f"fps={profile['fps']}",
+        # Same bar as the moviepy path: full width, 8px high, 10px from the top, 70% white
+        "drawbox=x=0:y=10:w=iw:h=8:color=white@0.7:t=fill",
+    ]
+    if (width, height) != source_size:
+        filters.append(f"scale={width}:{height}")
+    filters.append(f"subtitles=filename='{_filter_path(subtitles)}':fontsdir='{_filter_path(fonts_dir)}'")
+    return ",".join(filters)
+
+
+def _video_codec_args(profile, threads):
+    bitrate = ['-b:v', profile['bitrate']] if profile['bitrate'] else []
+    return [
+        '-c:v', 'libx264',
+        '-preset', profile['preset'],
+        *bitrate,
+        *x264_params(profile),
+        '-threads', str(threads or profile['threads']),
+    ]
+
+
+def render_with_ffmpeg(video_path, audio_file, output_video, caption_words, clip_start, clip_end,
+                       profile=None, threads=None, workspace=None, subtitles=None):
+    """Trim, caption, progress bar, encode and mux in one ffmpeg process; no frames pass through Python.
+
+    subtitles is an ASS file already written for caption_words at the video's size,
+    for renders that share one caption layout.
+    """
+    profile = profile or get_profile()
+    ws, owned = use_workspace(workspace, "ffmpeg")
+    try:
+        source_size = probe_video(video_path)
+        # Captions are laid out at source resolution; libass scales them to the output frame
+        if subtitles is None:
+            subtitles = write_ass_captions(caption_words, ws.file("captions.ass"), source_size)
+
+        subprocess.run([
+            'ffmpeg',
+            '-v', 'error',
+            # Input seeking: decoding starts at the keyframe before clip_start
+            '-ss', f'{clip_start:.3f}',
+            '-t', f'{clip_end - clip_start:.3f}',
+            '-i', video_path,
+            '-i', audio_file,
+            '-filter_complex', f'[0:v]{_video_filter(profile, source_size, subtitles)}[v]',
+            '-map', '[v]',
+            '-map', '1:a',
+            '-shortest',
+            *_video_codec_args(profile, threads),
+            '-c:a', 'aac',
+            '-b:a', profile['audio_bitrate'],
+            '-y', output_video
+        ], check=True)
+        return output_video
+    finally:
+        if owned:
+            ws.cleanup()
+
+
+# --- Segmented rendering (streaming synthesis) ---
+def render_video_segment(video_path, output_video, caption_words, clip_start, start_frame, frames, source_size,
+                         profile, threads=None, workspace=None):
+    """Encode `frames` captioned frames of the backdrop window at clip_start, from output frame start_frame, without audio.
+
+    Segments are cut on the profile's frame grid, so concatenating them gives the
+    same frames as one continuous render. caption_words are relative to the segment.
+    """
+    ws, owned = use_workspace(workspace, "segment")
+    try:
+        name = os.path.splitext(os.path.basename(output_video))[0]
+        subtitles = write_ass_captions(caption_words, ws.file(f"{name}.ass"), source_size)
+        subprocess.run([
+            'ffmpeg',
+            '-v', 'error',
+            '-ss', f'{clip_start + start_frame / profile["fps"]:.6f}',
+            '-i', video_path,
+            '-vf', _video_filter(profile, source_size, subtitles),
+            '-frames:v', str(frames),
+            '-an',
+            *_video_codec_args(profile, threads),
+            '-y', output_video
+        ], check=True)
+        return output_video
+    finally:
+        if owned:
+            ws.cleanup()
+
+
+def mux_segments(segments, audio_file, output_video, profile, workspace=None):
+    """Join encoded video segments without re-encoding them and add the audio track"""
+    ws, owned = use_workspace(workspace, "mux")
+    try:
+        playlist = ws.file("segments.txt")
+        with open(playlist, 'w', encoding='utf-8') as f:
+            for segment in segments:
+                f.write(f"file '{os.path.abspath(segment)}'\n")
+        subprocess.run([
+            'ffmpeg',
+            '-v', 'error',
+            '-f', 'concat', '-safe', '0', '-i', playlist,
+            '-i', audio_file,
+            '-map', '0:v',
+            '-map', '1:a',
+            '-shortest',
+            '-c:v', 'copy',
+            '-c:a', 'aac',
+            '-b:a', profile['audio_bitrate'],
+            '-movflags', '+faststart',
+            '-y', output_video
+        ], check=True)
+        return output_video
+    finally:
+        if owned:
+            ws.cleanup()
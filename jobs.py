@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# --- SETTINGS ---
+# Number of renders that may run at the same time in this process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+# Submissions beyond this many queued/running jobs are rejected
+MAX_PENDING_JOBS = int(os.environ.get("MAX_PENDING_JOBS", 100))
+# Finished jobs kept around for status polling
+MAX_FINISHED_JOBS = int(os.environ.get("MAX_FINISHED_JOBS", 200))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    """State of a single submitted render, updated by the worker that runs it"""
+
+    def __init__(self, kind, stages):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stages = {name: {"status": QUEUED, "progress": 0.0} for name in stages}
+        self.stage_order = list(stages)
+        self.result = {}
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start_stage(self, name):
+        with self._lock:
+            self.stages[name]["status"] = RUNNING
+
+    def update_stage(self, name, progress):
+        with self._lock:
+            self.stages[name]["progress"] = max(0.0, min(1.0, float(progress)))
+
+    def finish_stage(self, name):
+        with self._lock:
+            self.stages[name]["status"] = DONE
+            self.stages[name]["progress"] = 1.0
+
+    def set_result(self, **values):
+        with self._lock:
+            self.result.update(values)
+
+    def append_result(self, key, value):
+        with self._lock:
+            self.result.setdefault(key, []).append(value)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stages": [dict(name=name, **self.stages[name]) for name in self.stage_order],
+                "progress": sum(s["progress"] for s in self.stages.values()) / max(1, len(self.stages)),
+                "result": {k: list(v) if isinstance(v, list) else v for k, v in self.result.items()},
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobQueue:
+    """Bounded worker pool that runs pipeline functions in the background"""
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS, max_finished=MAX_FINISHED_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._max_pending = max_pending
+        self._max_finished = max_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, stages, **params):
+        """Queue fn(job, **params) and return the Job immediately"""
+        job = Job(kind, stages)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self._max_pending:
+                raise QueueFullError(f"Too many pending jobs ({pending})")
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, params)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def _run(self, job, fn, params):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            fn(job, **params)
+            job.status = DONE
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at)
+        for job in finished[:max(0, len(finished) - self._max_finished)]:
+            del self._jobs[job.id]
+
+
+job_queue = JobQueue()
@@ -0,0 +1,173 @@
+"""Shared Gemini client.
+
+One GenerativeModel per model name for the life of the process, so the SDK's
+underlying connection is reused. Every request gets a timeout, waits for one of
+LLM_CONCURRENCY slots and is retried with jittered exponential backoff on
+transient errors. Latency and token counts are kept in counters().
+
+LLM_CACHE=1 stores responses on disk, keyed by model, prompt, generation
+settings and a caller-chosen variant, so a run can be replayed exactly
+(variants keep replays of the same prompt distinct).
+
+LLM_API_ENDPOINT points the client at another server over REST, e.g. a local
+fake Gemini (benchmark.py llm) for tests.
+"""
+import os
+import time
+import random
+import threading
+from disk_cache import DiskCache, hash_key
+
+# --- SETTINGS ---
+# Required for any request; there is no default key
+GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+LLM_MODEL = os.environ.get("LLM_MODEL", "gemini-2.0-flash")
+LLM_API_ENDPOINT = os.environ.get("LLM_API_ENDPOINT")
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 30))  # seconds per request
+LLM_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", 4))
+LLM_RETRIES = int(os.environ.get("LLM_RETRIES", 3))
+LLM_BACKOFF = 1.0  # seconds before the first retry, doubled after each failure, plus jitter
+LLM_CACHE = os.environ.get("LLM_CACHE") == "1"
+LLM_CACHE_BYTES = int(os.environ.get("LLM_CACHE_MB", 32)) * 1024 * 1024
+
+_models = {}
+_models_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+_configured = False
+_cache = None
+
+_counters = {
+    'requests': 0,
+    'cache_hits': 0,
+    'retries': 0,
+    'failures': 0,
+    'latency_seconds': 0.0,
+    'max_latency_seconds': 0.0,
+    'prompt_tokens': 0,
+    'output_tokens': 0,
+}
+_counters_lock = threading.Lock()
+
+
+def _configure():
+    """The genai module, configured once (called with _models_lock held)"""
+    global _configured
+    from google import generativeai as genai
+    if not _configured:
+        if not GOOGLE_API_KEY:
+            raise RuntimeError("GOOGLE_API_KEY is not set; export your Gemini API key to generate scripts")
+        if LLM_API_ENDPOINT:
+            genai.configure(api_key=GOOGLE_API_KEY, transport='rest',
+                            client_options={'api_endpoint': LLM_API_ENDPOINT})
+        else:
+            genai.configure(api_key=GOOGLE_API_KEY)
+        _configured = True
+    return genai
+
+
+def set_endpoint(endpoint):
+    """Send requests to another server from now on (None: Google's); models are recreated"""
+    global LLM_API_ENDPOINT, _configured
+    with _models_lock:
+        LLM_API_ENDPOINT = endpoint
+        _configured = False
+        _models.clear()
+
+
+def get_model(model_name=LLM_MODEL):
+    """The shared GenerativeModel for model_name, created on first use"""
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = _configure().GenerativeModel(model_name)
+        return _models[model_name]
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("llm_responses", LLM_CACHE_BYTES, suffix=".json")
+    return _cache
+
+
+def _transient(error):
+    """Worth retrying: timeouts, rate limits, server errors and dropped connections"""
+    if isinstance(error, OSError):
+        # ConnectionError, TimeoutError and the requests exceptions of the REST transport
+        return True
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return False
+    return isinstance(error, (exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+                              exceptions.DeadlineExceeded, exceptions.InternalServerError,
+                              exceptions.TooManyRequests))
+
+
+def _count(**values):
+    with _counters_lock:
+        for name, value in values.items():
+            _counters[name] += value
+
+
+def _request(model, prompt, generation_config):
+    """One generate_content call with retries; returns the response"""
+    for attempt in range(LLM_RETRIES):
+        start = time.perf_counter()
+        try:
+            with _slots:
+                response = model.generate_content(prompt, generation_config=generation_config,
+                                                  request_options={'timeout': LLM_TIMEOUT})
+        except Exception as e:
+            if attempt == LLM_RETRIES - 1 or not _transient(e):
+                raise
+            delay = LLM_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+            print(f"LLM request failed ({e}), retrying in {delay:.1f}s...")
+            _count(retries=1)
+            time.sleep(delay)
+            continue
+        latency = time.perf_counter() - start
+        usage = getattr(response, 'usage_metadata', None)
+        with _counters_lock:
+            _counters['requests'] += 1
+            _counters['latency_seconds'] += latency
+            _counters['max_latency_seconds'] = max(_counters['max_latency_seconds'], latency)
+            _counters['prompt_tokens'] += getattr(usage, 'prompt_token_count', 0) or 0
+            _counters['output_tokens'] += getattr(usage, 'candidates_token_count', 0) or 0
+        return response
+
+
+def generate_text(prompt, model=None, model_name=LLM_MODEL, generation_config=None, variant=None,
+                  use_cache=LLM_CACHE):
+    """Text of one completion, or None when the request fails or the response is empty.
+
+    model is any object with generate_content (default: the shared GenerativeModel
+    for model_name), so a stub model gets the same limits, retries and counters.
+    """
+    source = model_name if model is None else type(model).__name__
+    key = hash_key(source, prompt, generation_config, variant) if use_cache else None
+    if key is not None:
+        entry = _get_cache().get_json(key)
+        if entry is not None:
+            _count(cache_hits=1)
+            return entry['text']
+
+    try:
+        response = _request(model or get_model(model_name), prompt, generation_config)
+        text = response.text
+    except Exception as e:
+        print(f"Error: {e}")
+        _count(failures=1)
+        return None
+    if not text:
+        return None
+    if key is not None:
+        _get_cache().put_json(key, {'text': text})
+    return text
+
+
+def counters():
+    """Copy of the request counters, with the mean latency"""
+    with _counters_lock:
+        values = dict(_counters)
+    values['mean_latency_seconds'] = values['latency_seconds'] / values['requests'] if values['requests'] else 0.0
+    return values
@@ -0,0 +1,218 @@
+"""Lazy, shared access to the XTTS voice model.
+
+By default the model is loaded in-process the first time something is synthesized.
+Set SYNTH_WORKER_ADDRESS (host:port or a unix socket path) to send synthesis to a
+dedicated worker instead, started with `python model_registry.py`; web workers then
+never load the model at all.
+
+Worker connections exchange pickles, which can run code, so both sides need the
+same SYNTH_WORKER_AUTHKEY (there is no default) and the address must be a unix
+socket or a loopback host unless SYNTH_WORKER_ALLOW_REMOTE=1.
+"""
+import os
+import sys
+import ipaddress
+import threading
+import traceback
+from multiprocessing.connection import Listener, Client
+
+# --- SETTINGS ---
+XTTS_MODEL = "tts_models/multilingual/multi-dataset/xtts_v2"
+SYNTH_WORKER_ADDRESS = os.environ.get("SYNTH_WORKER_ADDRESS")
+SYNTH_WORKER_AUTHKEY = os.environ.get("SYNTH_WORKER_AUTHKEY", "").encode()
+# Listen on or connect to hosts other than loopback; only on a trusted network
+SYNTH_WORKER_ALLOW_REMOTE = os.environ.get("SYNTH_WORKER_ALLOW_REMOTE") == "1"
+
+_models = {}
+_models_lock = threading.Lock()
+# One synthesis at a time per model; XTTS is not re-entrant
+_synthesis_lock = threading.Lock()
+
+
+def get_device():
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def get_tts(model_name=XTTS_MODEL):
+    """Return the TTS model, loading it on first use"""
+    with _models_lock:
+        if model_name not in _models:
+            from TTS.api import TTS
+            device = get_device()
+            print(f"Loading {model_name} on {device}...")
+            _models[model_name] = TTS(model_name).to(device)
+        return _models[model_name]
+
+
+# --- Calls that can run locally or in the synthesis worker ---
+def _local_synthesize(text, reference_audio, file_path=None, language="en", speed=1.0, temperature=0.65,
+                      length_penalty=1.0, split_sentences=True):
+    import voice_profiles
+    from audio_buffer import AudioBuffer
+
+    model = get_tts().synthesizer.tts_model
+    config = model.config
+    with _synthesis_lock:
+        # Speaker latents come from the voice profile cache; only the text is new work
+        gpt_cond_latent, speaker_embedding = voice_profiles.conditioning_latents(model, XTTS_MODEL, reference_audio)
+        out = model.inference(
+            text,
+            language,
+            gpt_cond_latent,
+            speaker_embedding,
+            temperature=temperature,
+            length_penalty=length_penalty,
+            repetition_penalty=config.repetition_penalty,
+            top_k=config.top_k,
+            top_p=config.top_p,
+            speed=speed,
+            enable_text_splitting=split_sentences,
+        )
+    audio = AudioBuffer(out['wav'], config.audio.output_sample_rate)
+    if file_path is None:
+        return audio
+    return audio.write(file_path)
+
+
+def _local_synthesize_stream(sentences, reference_audio, language="en", speed=1.0, temperature=0.65,
+                             length_penalty=1.0):
+    """Yield one AudioBuffer per sentence as soon as it is synthesized"""
+    import voice_profiles
+    from audio_buffer import AudioBuffer
+
+    model = get_tts().synthesizer.tts_model
+    config = model.config
+    with _synthesis_lock:
+        gpt_cond_latent, speaker_embedding = voice_profiles.conditioning_latents(model, XTTS_MODEL, reference_audio)
+    for sentence in sentences:
+        # Lock per sentence so other requests can interleave between chunks
+        with _synthesis_lock:
+            out = model.inference(
+                sentence,
+                language,
+                gpt_cond_latent,
+                speaker_embedding,
+                temperature=temperature,
+                length_penalty=length_penalty,
+                repetition_penalty=config.repetition_penalty,
+                top_k=config.top_k,
+                top_p=config.top_p,
+                speed=speed,
+                enable_text_splitting=False,
+            )
+        yield AudioBuffer(out['wav'], config.audio.output_sample_rate)
+
+
+LOCAL_CALLS = {
+    'synthesize': _local_synthesize,
+}
+# Calls that yield several results; the worker sends each one as it is produced
+LOCAL_STREAMS = {
+    'synthesize_stream': _local_synthesize_stream,
+}
+
+
+def _parse_address(address):
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+def _is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+def _worker_address(address):
+    """Parsed worker address, refusing setups where anyone on the network could send pickles"""
+    if not SYNTH_WORKER_AUTHKEY:
+        raise RuntimeError("SYNTH_WORKER_AUTHKEY is not set; give the worker and its clients the same secret")
+    parsed = _parse_address(address)
+    if isinstance(parsed, tuple) and not _is_loopback(parsed[0]) and not SYNTH_WORKER_ALLOW_REMOTE:
+        raise RuntimeError(f"Synthesis worker address {address} is not loopback; "
+                           "set SYNTH_WORKER_ALLOW_REMOTE=1 to allow it on a trusted network")
+    return parsed
+
+
+def call(name, **kwargs):
+    """Run a synthesis call in the worker when one is configured, otherwise in-process"""
+    if not SYNTH_WORKER_ADDRESS:
+        return LOCAL_CALLS[name](**kwargs)
+
+    with Client(_worker_address(SYNTH_WORKER_ADDRESS), authkey=SYNTH_WORKER_AUTHKEY) as conn:
+        conn.send((name, kwargs))
+        status, value = conn.recv()
+    if status != 'ok':
+        raise RuntimeError(f"Synthesis worker failed: {value}")
+    return value
+
+
+def stream(name, **kwargs):
+    """Iterate a streaming call, in the worker when one is configured, otherwise in-process"""
+    if not SYNTH_WORKER_ADDRESS:
+        yield from LOCAL_STREAMS[name](**kwargs)
+        return
+
+    with Client(_worker_address(SYNTH_WORKER_ADDRESS), authkey=SYNTH_WORKER_AUTHKEY) as conn:
+        conn.send((name, kwargs))
+        while True:
+            status, value = conn.recv()
+            if status == 'end':
+                return
+            if status != 'chunk':
+                raise RuntimeError(f"Synthesis worker failed: {value}")
+            yield value
+
+
+def synthesize_stream(**kwargs):
+    """Clone reference_audio's voice saying each of `sentences`; yields an AudioBuffer per sentence"""
+    return stream('synthesize_stream', **kwargs)
+
+
+def synthesize(**kwargs):
+    """Clone reference_audio's voice saying text; returns an AudioBuffer, or the written path when file_path is given"""
+    return call('synthesize', **kwargs)
+
+
+# --- Synthesis worker ---
+def _handle(conn):
+    with conn:
+        try:
+            name, kwargs = conn.recv()
+            if name in LOCAL_STREAMS:
+                for value in LOCAL_STREAMS[name](**kwargs):
+                    conn.send(('chunk', value))
+                conn.send(('end', None))
+            else:
+                conn.send(('ok', LOCAL_CALLS[name](**kwargs)))
+        except EOFError:
+            pass
+        except Exception as e:
+            traceback.print_exc()
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+def serve(address):
+    """Load the model once and answer synthesis calls from other processes"""
+    listen_address = _worker_address(address)
+    get_tts()
+    with Listener(listen_address, authkey=SYNTH_WORKER_AUTHKEY) as listener:
+        print(f"Synthesis worker listening on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Bad authkey or a client that hung up during the handshake
+                print(f"Rejected connection: {e}")
+                continue
+            threading.Thread(target=_handle, args=(conn,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else (SYNTH_WORKER_ADDRESS or "127.0.0.1:6001"))
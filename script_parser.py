@@ -0,0 +1,142 @@
+"""One parser for [Speaker] scripts, shared by every stage.
+
+    [Boy] Just found out my gf has been...
+    [Girl] [SFX: gasp] Cheating? 😱
+
+parse_script() turns the text into a Script: a tuple of ScriptLines, each with
+its speaker, the text to speak, display tokens (caption words as written),
+normalized tokens (for matching against a transcript) and SFX events. Emoji
+and bracketed tags are never spoken or captioned, and tokens with no letters
+or digits ("...", "-") are spoken but not captioned, so synthesis, timing and
+captions all see the same words.
+
+A job parses its script once and passes the Script on; functions that take a
+script accept either form through as_script().
+"""
+import re
+from functools import lru_cache
+from alignment import normalize_word
+
+# --- SETTINGS ---
+# Parsed scripts kept per process, keyed by their text
+PARSE_CACHE_SIZE = 256
+
+_TAG = re.compile(r"\[([^\[\]]*)\]")
+_LEADING_TAG = re.compile(r"\s*\[([^\[\]]*)\]")
+_SFX_PREFIX = re.compile(r"^\s*SFX\s*:\s*", re.IGNORECASE)
+# Pictographs, symbols, dingbats, variation selectors, joiners and keycaps
+_EMOJI = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0E\uFE0F\u200D\u20E3]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class ScriptLine:
+    """One non-empty script line. display and tokens line up one to one."""
+
+    __slots__ = ('index', 'speaker', 'text', 'display', 'tokens', 'sfx')
+
+    def __init__(self, index, speaker, text, display, tokens, sfx):
+        self.index = index  # position among the script's non-empty lines
+        self.speaker = speaker  # None when the line has no [Speaker] tag
+        self.text = text  # what is spoken: tags and emoji removed
+        self.display = display  # caption words, punctuation kept
+        self.tokens = tokens  # normalize_word of each display word
+        self.sfx = sfx  # (display position, name) for each [SFX: name] or other inline tag
+
+    def sentences(self):
+        """Spoken text split after . ! and ?; pieces with no words ("...") are dropped"""
+        return [s for s in _SENTENCE_END.split(self.text) if normalize_word(s)]
+
+    def __repr__(self):
+        return f"ScriptLine({self.index}, {self.speaker!r}, {self.text!r}, sfx={self.sfx!r})"
+
+
+class Script:
+    """Parsed script: its lines in order, plus any problems found while parsing"""
+
+    __slots__ = ('source', 'lines', 'warnings')
+
+    def __init__(self, source, lines, warnings):
+        self.source = source
+        self.lines = lines
+        self.warnings = warnings
+
+    def spoken_lines(self):
+        """Lines with something to say, in order"""
+        return [line for line in self.lines if line.text]
+
+    def words(self):
+        """Every display word, in order"""
+        return [word for line in self.lines for word in line.display]
+
+    def tokens(self):
+        return [token for line in self.lines for token in line.tokens]
+
+    def spoken_text(self):
+        """The whole script as one text for a single-voice synthesizer"""
+        return " ".join(line.text for line in self.lines if line.text)
+
+    def sentences(self):
+        return [sentence for line in self.lines for sentence in line.sentences()]
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __str__(self):
+        return self.source
+
+    def __eq__(self, other):
+        return isinstance(other, Script) and other.source == self.source
+
+    def __hash__(self):
+        return hash(self.source)
+
+
+def parse_line(index, raw):
+    """ScriptLine for one line of text, and a warning or None"""
+    line = _EMOJI.sub("", raw).strip()
+    speaker = None
+    warning = None
+    match = _LEADING_TAG.match(line)
+    if match and not _SFX_PREFIX.match(match.group(1)):
+        speaker = match.group(1).strip() or None
+        line = line[match.end():]
+    if speaker is None:
+        warning = f"line {index + 1} has no [Speaker] tag: {raw.strip()!r}"
+
+    spoken, display, tokens, sfx = [], [], [], []
+    pieces = _TAG.split(line)
+    # split() alternates text and the contents of a tag
+    for i, piece in enumerate(pieces):
+        if i % 2:
+            sfx.append((len(display), _SFX_PREFIX.sub("", piece).strip()))
+            continue
+        if '[' in piece or ']' in piece:
+            warning = warning or f"line {index + 1} has an unmatched bracket: {raw.strip()!r}"
+            piece = piece.replace('[', ' ').replace(']', ' ')
+        for word in piece.split():
+            spoken.append(word)
+            token = normalize_word(word)
+            if token:
+                display.append(word)
+                tokens.append(token)
+    return ScriptLine(index, speaker, " ".join(spoken), tuple(display), tuple(tokens), tuple(sfx)), warning
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_script(text):
+    """Script for a [Speaker] script text; blank lines are skipped"""
+    lines, warnings = [], []
+    for index, raw in enumerate(ln for ln in text.split('\n') if ln.strip()):
+        line, warning = parse_line(index, raw)
+        lines.append(line)
+        if warning:
+            warnings.append(warning)
+    return Script(text, tuple(lines), tuple(warnings))
+
+
+def as_script(script):
+    """Script for a Script or a script text"""
+    return script if isinstance(script, Script) else parse_script(script)
@@ -0,0 +1,192 @@
+"""Conversation scripts generated ahead of time.
+
+generate_viral_conversation() is an LLM round-trip. A ScriptPool keeps up to
+SCRIPT_POOL_SIZE finished scripts ready: SCRIPT_POOL_WORKERS background threads
+refill it as scripts are taken, never starting more than SCRIPT_RATE_LIMIT
+requests a minute between them. take_script() returns a pooled script at once,
+or waits for the next one when the pool has run dry.
+
+SCRIPT_GENERATOR=stub swaps Gemini for StubGenerativeModel, a local model with
+the same generate_content() call, so the pool can run offline.
+"""
+import os
+import queue
+import itertools
+import random
+import threading
+import time
+
+# --- SETTINGS ---
+SCRIPT_POOL_SIZE = int(os.environ.get("SCRIPT_POOL_SIZE", 8))
+SCRIPT_POOL_WORKERS = int(os.environ.get("SCRIPT_POOL_WORKERS", 2))
+# Requests per minute across all refill threads and direct calls
+SCRIPT_RATE_LIMIT = float(os.environ.get("SCRIPT_RATE_LIMIT", 30))
+SCRIPT_GENERATOR = os.environ.get("SCRIPT_GENERATOR", "gemini")
+# How long take_script() waits for a refill before generating a script itself
+SCRIPT_WAIT = 30.0
+# After a failed request a refill thread waits this long, doubled per failure up to SCRIPT_MAX_BACKOFF
+SCRIPT_BACKOFF = 1.0
+SCRIPT_MAX_BACKOFF = 60.0
+# Stub model: simulated request latency
+STUB_SCRIPT_LATENCY = float(os.environ.get("STUB_SCRIPT_LATENCY", 1.0))
+
+STUB_EXCHANGES = [
+    ("Bro, just saw my neighbor doing the griddy...", "Bruh, no way, record it!"),
+    ("Just found out my gf has been sneaking out every night.", "Cheating?"),
+    ("Wait what? My cat just opened the fridge.", "No cap, that cat pays rent now."),
+    ("I did! But wait what? He stopped...", "And...? Don't leave me hanging!"),
+    ("He pulled out a trombone.", "A trombone?! No cap?"),
+    ("Worse... she puts ketchup on pizza.", "That's a CRIME!"),
+    ("I know right? Pineapple too!", "Okay now you're just lying."),
+    ("Dead serious!", "He's starting a marching band, isn't he?"),
+]
+
+
+class StubGenerativeModel:
+    """Local stand-in for genai.GenerativeModel: random [Boy]/[Girl] scripts after a fake delay"""
+
+    def __init__(self, latency=STUB_SCRIPT_LATENCY, rng=None):
+        self.latency = latency
+        self.rng = rng or random.Random()
+
+    def generate_content(self, prompt, **_):
+        time.sleep(self.latency)
+        exchanges = self.rng.sample(STUB_EXCHANGES, self.rng.randint(3, 4))
+        text = "\n".join(f"[Boy] {boy}\n[Girl] {girl}" for boy, girl in exchanges)
+        return type("StubResponse", (), {"text": text})()
+
+
+class RateLimiter:
+    """Spaces calls at least 60 / per_minute seconds apart, across threads"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        time.sleep(start - now)
+
+
+def default_generator(name=SCRIPT_GENERATOR):
+    """() -> script or None for a generator name ("gemini" or "stub").
+
+    Each call asks for the next variant, so with LLM_CACHE=1 a replay returns the
+    same sequence of different scripts instead of one script over and over.
+    """
+    from create_raw_voices import generate_viral_conversation
+    if name not in ("gemini", "stub"):
+        raise ValueError(f"Unknown script generator: {name}")
+    model = StubGenerativeModel() if name == "stub" else None
+    variants = itertools.count()
+    return lambda: generate_viral_conversation(model=model, variant=next(variants))
+
+
+class ScriptPool:
+    """Bounded pool of ready scripts, refilled by background threads.
+
+    generator() returns a script, or None when the request failed. With size=0
+    nothing is prefetched and take() generates every script on demand.
+    """
+
+    def __init__(self, generator=None, size=SCRIPT_POOL_SIZE, workers=SCRIPT_POOL_WORKERS,
+                 rate_limit=SCRIPT_RATE_LIMIT):
+        self.generator = generator or default_generator()
+        self.size = size
+        self.workers = workers
+        self.scripts = queue.Queue(maxsize=max(1, size))
+        self.limiter = RateLimiter(rate_limit)
+        self.stats = {'taken': 0, 'waited': 0, 'generated': 0, 'failed': 0}
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _generate(self):
+        self.limiter.wait()
+        script = self.generator()
+        with self._lock:
+            self.stats['generated' if script else 'failed'] += 1
+        return script
+
+    def _refill(self):
+        backoff = SCRIPT_BACKOFF
+        while not self._stop.is_set():
+            script = self._generate()
+            if not script:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, SCRIPT_MAX_BACKOFF)
+                continue
+            backoff = SCRIPT_BACKOFF
+            # Blocks while the pool is full; wakes up now and then to notice stop()
+            while not self._stop.is_set():
+                try:
+                    self.scripts.put(script, timeout=1.0)
+                    break
+                except queue.Full:
+                    pass
+
+    def start(self):
+        """Start the refill threads if they are not running; returns the pool"""
+        with self._lock:
+            # Threads do not survive a fork (a preloading server), so check they are alive
+            if self.size > 0 and not any(thread.is_alive() for thread in self._threads):
+                self._threads = []
+                self._stop.clear()
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._refill, name=f"script-pool-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def ready(self):
+        """Number of scripts waiting in the pool"""
+        return self.scripts.qsize()
+
+    def take(self, wait=SCRIPT_WAIT):
+        """A ready script; waits up to `wait` seconds for a refill, then generates one directly.
+
+        Returns None only when that direct request fails too.
+        """
+        self.start()
+        if self.size > 0:
+            try:
+                script = self.scripts.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self.stats['waited'] += 1
+                try:
+                    script = self.scripts.get(timeout=wait)
+                except queue.Empty:
+                    script = None
+            if script:
+                with self._lock:
+                    self.stats['taken'] += 1
+                return script
+        return self._generate()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def script_pool():
+    """The process-wide pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScriptPool()
+        return _pool
+
+
+def take_script(wait=SCRIPT_WAIT):
+    return script_pool().take(wait)
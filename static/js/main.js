@@ -149,39 +149,63 @@ function showToast(message, type = 'info') {
     });
 }
 
-// Handle Form Submission
-videoForm.addEventListener('submit', async (e) => {
-    e.preventDefault();
-    
-    // Validate form
-    if (!promptTextarea.value || !voiceSelect.value || !backdropSelect.value) {
-        showToast('Please fill in all fields!', 'warning');
-        return;
+// Poll a background job until it is done or failed
+const JOB_POLL_INTERVAL = 2000;
+
+function describeJob(job) {
+    const stage = job.stages.find(s => s.status === 'running');
+    if (job.status === 'queued') return 'Waiting in queue...';
+    if (!stage) return 'Finishing up...';
+    return `Running ${stage.name} (${Math.round(stage.progress * 100)}%)...`;
+}
+
+async function submitJob(url, payload) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(payload)
+    });
+    const data = await response.json();
+    if (data.error) {
+        throw new Error(data.error);
     }
-    
-    // Show loading state
+    return data;
+}
+
+async function waitForJob(statusUrl, onUpdate) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (job.error && !job.status) {
+            throw new Error(job.error);
+        }
+        if (onUpdate) onUpdate(job);
+        if (job.status === 'done') return job;
+        if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+    }
+}
+
+function setLoadingText(text) {
+    loadingSpinner.querySelector('p').textContent = text;
+}
+
+// Render a single video with the given encoding profile ('draft' first, 'publish' once approved).
+// An approved draft is re-encoded from its own voice track (/render), since cloning again
+// would give a different take than the one approved.
+async function renderVideo(params, profile, draftId = null) {
     generateBtn.disabled = true;
     loadingSpinner.classList.remove('d-none');
     previewArea.innerHTML = '';
     
     try {
-        const response = await fetch('/generate', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                prompt: promptTextarea.value,
-                voice: voiceSelect.value,
-                backdrop: backdropSelect.value
-            })
-        });
-        
-        const data = await response.json();
-        
-        if (data.error) {
-            throw new Error(data.error);
-        }
+        const submitted = draftId
+            ? await submitJob('/render', { draft_id: draftId, profile: profile })
+            : await submitJob('/generate', { ...params, profile: profile });
+        const job = await waitForJob(submitted.status_url, job => setLoadingText(describeJob(job)));
+        const data = job.result;
         
         // Show generated video
         const video = document.createElement('video');
@@ -193,15 +217,27 @@ videoForm.addEventListener('submit', async (e) => {
         // Add download button
         const downloadBtn = document.createElement('a');
         downloadBtn.href = data.video_url;
-        downloadBtn.download = 'generated_video.mp4';
+        downloadBtn.download = `generated_video_${profile}.mp4`;
         downloadBtn.className = 'btn btn-success mt-3';
-        downloadBtn.innerHTML = '<i class="fas fa-download me-2"></i>Download Video';
+        downloadBtn.innerHTML = profile === 'draft'
+            ? '<i class="fas fa-download me-2"></i>Download Draft'
+            : '<i class="fas fa-download me-2"></i>Download Video';
         
         previewArea.innerHTML = '';
         previewArea.appendChild(video);
         previewArea.appendChild(downloadBtn);
         
-        showToast('Video generated successfully!', 'success');
+        // Drafts can be approved for the full-quality encode of the same audio
+        if (profile === 'draft' && data.draft_id) {
+            const approveBtn = document.createElement('button');
+            approveBtn.type = 'button';
+            approveBtn.className = 'btn btn-primary mt-3 ms-2';
+            approveBtn.innerHTML = '<i class="fas fa-check me-2"></i>Approve & Render Final';
+            approveBtn.addEventListener('click', () => renderVideo(params, 'publish', data.draft_id));
+            previewArea.appendChild(approveBtn);
+        }
+        
+        showToast(profile === 'draft' ? 'Draft ready! Approve it to render the final video.' : 'Video generated successfully!', 'success');
         
     } catch (error) {
         showToast(error.message || 'Failed to generate video', 'error');
@@ -209,7 +245,25 @@ videoForm.addEventListener('submit', async (e) => {
         // Reset loading state
         generateBtn.disabled = false;
         loadingSpinner.classList.add('d-none');
+        setLoadingText('Generating your video...');
+    }
+}
+
+// Handle Form Submission
+videoForm.addEventListener('submit', async (e) => {
+    e.preventDefault();
+    
+    // Validate form
+    if (!promptTextarea.value || !voiceSelect.value || !backdropSelect.value) {
+        showToast('Please fill in all fields!', 'warning');
+        return;
     }
+    
+    await renderVideo({
+        prompt: promptTextarea.value,
+        voice: voiceSelect.value,
+        backdrop: backdropSelect.value
+    }, 'draft');
 });
 
 // Add input validation
@@ -231,20 +285,17 @@ async function handleBatchGenerate(count) {
     loadingSpinner.classList.remove('d-none');
     previewArea.innerHTML = '';
     try {
-        const response = await fetch('/generate-batch', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                count: count,
-                voice: voiceSelect.value,
-                backdrop: backdropSelect.value,
-                prompt: promptTextarea.value // Use current script if set, else backend will randomize
-            })
+        const submitted = await submitJob('/generate-batch', {
+            count: count,
+            voice: voiceSelect.value,
+            backdrop: backdropSelect.value,
+            prompt: promptTextarea.value // Use current script if set, else backend will randomize
         });
-        const data = await response.json();
-        if (data.error) throw new Error(data.error);
+        const job = await waitForJob(submitted.status_url, job => {
+            const done = (job.result.video_urls || []).length;
+            setLoadingText(`${describeJob(job)} ${done}/${count} videos ready`);
+        });
+        const data = job.result;
         // Show download links for all videos
         previewArea.innerHTML = '<h5 class="mb-3">Batch Videos</h5>';
         data.video_urls.forEach((url, idx) => {
@@ -262,6 +313,7 @@ async function handleBatchGenerate(count) {
         generateBatch10Btn.disabled = false;
         generateBatch20Btn.disabled = false;
         loadingSpinner.classList.add('d-none');
+        setLoadingText('Generating your video...');
     }
 }
 
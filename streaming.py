@@ -0,0 +1,72 @@
+"""Render while the voice is still being synthesized.
+
+Speech arrives one sentence at a time (duplicate_audio.duplicate_audio_stream).
+Each sentence is aligned and its stretch of video is encoded as soon as it
+arrives, while later sentences are still being synthesized. The segments are
+then joined without re-encoding and the full voice track is muxed in once.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from workspace import use_workspace
+from audio_buffer import concatenate
+from timing_sources import word_timings as script_word_timings
+from ffmpeg_render import probe_video, render_video_segment, mux_segments
+from encoding_profiles import get_profile
+from generate_video import build_caption_words
+
+# --- SETTINGS ---
+# Segment encodes running at once next to synthesis
+STREAM_ENCODERS = int(os.environ.get("STREAM_ENCODERS", 2))
+
+
+def sentence_word_timings(text, audio):
+    """Word timings of one sentence from the cheapest accurate source (see timing_sources.py)"""
+    return script_word_timings(audio, text)[0]
+
+
+def render_streaming(chunks, video_path, output_video, clip_start=10, profile=None, threads=None,
+                     workspace=None, word_timings=sentence_word_timings, on_chunk=None):
+    """Render (sentence, AudioBuffer) chunks to output_video as they arrive.
+
+    word_timings(text, audio) gives the timings of one sentence relative to its
+    own audio. Segments are cut on the output frame grid, so the joined video
+    lines up with the joined audio. on_chunk(index, seconds) is called as each
+    sentence arrives. The joined track is peak-normalized like duplicate_audio's.
+    Returns output_video, or None when no chunk arrived.
+    """
+    profile = profile if isinstance(profile, dict) else get_profile(profile)
+    fps = profile['fps']
+    ws, owned = use_workspace(workspace, "stream")
+    try:
+        source_size = probe_video(video_path)
+        buffers = []
+        segments = []
+        elapsed = 0.0  # seconds of speech before this chunk
+        with ThreadPoolExecutor(max_workers=STREAM_ENCODERS) as encoders:
+            for index, (text, audio) in enumerate(chunks):
+                buffers.append(audio)
+                start_frame = round(elapsed * fps)
+                elapsed += audio.duration
+                frames = round(elapsed * fps) - start_frame
+                if on_chunk:
+                    on_chunk(index, elapsed)
+                if frames <= 0:
+                    continue
+
+                # Captions relative to the segment's first frame
+                offset = elapsed - audio.duration - start_frame / fps
+                captions = [(word, start + offset, duration)
+                            for word, start, duration in build_caption_words(text, word_timings(text, audio))]
+                segment = ws.file(f"segment_{index:04d}.mp4")
+                segments.append(encoders.submit(
+                    render_video_segment, video_path, segment, captions, clip_start, start_frame, frames,
+                    source_size, profile, threads, ws))
+            segments = [future.result() for future in segments]
+
+        if not segments:
+            return None
+        audio = concatenate(buffers).peak_normalized(0.9)
+        return mux_segments(segments, audio.write(ws.file("voice.wav")), output_video, profile, ws)
+    finally:
+        if owned:
+            ws.cleanup()
@@ -0,0 +1,107 @@
+"""Synthesized lines kept on disk, so only new or edited lines are synthesized.
+
+Each line's decoded audio is stored under a key built from its text (whitespace
+collapsed), the voice that spoke it and the settings that shaped it: TTS
+parameters for raw speech, plus the effect chain for processed lines. A script
+with one edited line then costs one line of synthesis; every other line is
+loaded from cache/synthesis_lines/ (SYNTHESIS_CACHE_MB caps its size, least
+recently used evicted first). SYNTHESIS_CACHE=0 turns it off.
+"""
+import os
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from audio_buffer import AudioBuffer
+from disk_cache import DiskCache, hash_key
+
+# --- SETTINGS ---
+SYNTHESIS_CACHE = os.environ.get("SYNTHESIS_CACHE", "1") == "1"
+SYNTHESIS_CACHE_BYTES = int(os.environ.get("SYNTHESIS_CACHE_MB", 512)) * 1024 * 1024
+# Bump when the stored format or a synthesizer changes so old lines are not reused
+SYNTHESIS_CACHE_VERSION = 1
+
+_cache = None
+_counters = {'hits': 0, 'misses': 0}
+_counters_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("synthesis_lines", SYNTHESIS_CACHE_BYTES, suffix=".npz")
+    return _cache
+
+
+def normalize_text(text):
+    """Text as the synthesizer sees it: Unicode NFC, runs of whitespace collapsed.
+
+    Case and punctuation are kept, since both change how a line is spoken.
+    """
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+def line_key(text, voice, settings=None):
+    """Cache key for one line; voice names the speaker, settings everything else that shapes the audio"""
+    return hash_key(SYNTHESIS_CACHE_VERSION, normalize_text(text), voice, settings)
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def get_line(key):
+    """Cached AudioBuffer for key, or None"""
+    if not SYNTHESIS_CACHE:
+        return None
+    path = _get_cache().get_path(key)
+    if path is not None:
+        try:
+            with np.load(path) as entry:
+                audio = AudioBuffer(entry['samples'], int(entry['sample_rate']))
+            _count('hits')
+            return audio
+        except (OSError, ValueError, KeyError):
+            pass  # Corrupt or evicted while reading, treat as a miss
+    _count('misses')
+    return None
+
+
+def put_line(key, audio):
+    """Store audio under key; returns audio"""
+    if SYNTHESIS_CACHE:
+        _get_cache().put_file(key, lambda path: np.savez(path, samples=audio.samples,
+                                                         sample_rate=audio.sample_rate))
+    return audio
+
+
+def cached_line(key, make):
+    """Cached AudioBuffer for key, or make() stored under it"""
+    audio = get_line(key)
+    return audio if audio is not None else put_line(key, make())
+
+
+def synthesize_lines(texts, keys, synthesize, workers=1):
+    """AudioBuffer per text, in order, or the exception that stopped it.
+
+    Lines found in the cache are loaded; only the rest go to synthesize(text),
+    `workers` at a time, and are stored as they finish.
+    """
+    results = [get_line(key) for key in keys]
+    missing = [i for i, audio in enumerate(results) if audio is None]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+            futures = {i: pool.submit(synthesize, texts[i]) for i in missing}
+            for i, future in futures.items():
+                try:
+                    results[i] = put_line(keys[i], future.result())
+                except Exception as e:
+                    results[i] = e
+    return results
+
+
+def counters():
+    """Copy of the hit and miss counts of this process"""
+    with _counters_lock:
+        return dict(_counters)
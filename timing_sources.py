@@ -0,0 +1,202 @@
+"""Where caption word timings come from.
+
+Three sources, cheapest first:
+
+- synth: timings the synthesizer already produced (create_ai_voices spreads each
+  line's words evenly over the line's measured duration)
+- energy: a forced aligner that fits the known script words to the pauses in
+  the audio's loudness envelope
+- whisper: full transcription
+
+Each source also estimates its own error in seconds. word_timings() returns
+the first source in TIMING_AUTO_SOURCES whose estimate is within TIMING_MAX_ERROR;
+Whisper is the fallback. The energy aligner's estimate has only been checked on
+synthetic audio, so it is left out of auto mode unless TIMING_AUTO_SOURCES
+lists it (validate on real clips first: benchmark.py timing --audio).
+"""
+import os
+import re
+import numpy as np
+from alignment import normalize_word
+from audio_buffer import load_audio
+from script_parser import as_script
+from transcription import transcribe_words, DEFAULT_MODEL
+
+# --- SETTINGS ---
+TIMING_MAX_ERROR = float(os.environ.get("TIMING_MAX_ERROR", 0.15))  # seconds
+# Sources auto mode may pick before falling back to Whisper, cheapest first; e.g. "synth,energy"
+TIMING_AUTO_SOURCES = [name.strip() for name in os.environ.get("TIMING_AUTO_SOURCES", "synth").split(",")
+                       if name.strip()]
+# Words between two anchors are placed by proportion; assume they are off by this share of the span
+INTERPOLATION_ERROR = 0.1
+# Loudness envelope for pause detection
+FRAME_SECONDS = 0.01
+SILENCE_DB = -35.0  # relative to the loudest frame
+MIN_PAUSE = 0.06
+# A pause further than this from any expected word boundary is a gap inside a word
+MAX_ANCHOR_DISTANCE = 0.35
+
+
+def script_words(script):
+    """Caption words of a [Speaker] script (text or Script), in order"""
+    return as_script(script).words()
+
+
+# --- Loudness envelope ---
+def _frames(audio):
+    """Per-frame loudness in dB relative to the loudest frame, at FRAME_SECONDS resolution"""
+    samples = audio.mono()
+    size = max(1, int(audio.sample_rate * FRAME_SECONDS))
+    count = len(samples) // size
+    if count == 0:
+        return np.zeros(0)
+    rms = np.sqrt(np.mean(samples[:count * size].reshape(count, size) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-9) / max(float(rms.max()), 1e-9))
+
+
+def _speech_spans(audio):
+    """(start, end) seconds of each stretch of speech, split at pauses of at least MIN_PAUSE"""
+    speech = _frames(audio) > SILENCE_DB
+    if not speech.any():
+        return []
+    # Edges of speech runs
+    padded = np.concatenate([[False], speech, [False]])
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    runs = list(zip(changes[::2], changes[1::2]))
+    spans = [list(runs[0])]
+    for start, end in runs[1:]:
+        if (start - spans[-1][1]) * FRAME_SECONDS < MIN_PAUSE:
+            spans[-1][1] = end  # too short to be a pause
+        else:
+            spans.append([start, end])
+    return [(start * FRAME_SECONDS, end * FRAME_SECONDS) for start, end in spans]
+
+
+def _word_weight(word):
+    """Relative spoken length of a word: its vowel groups (about its syllables), plus a little"""
+    return max(1, len(re.findall(r"[aeiouy]+", normalize_word(word)))) + 0.5
+
+
+def _pause_error(timings, spans):
+    """Mean distance from each pause between spans to the nearest word boundary in timings"""
+    if len(spans) < 2 or not timings:
+        return 0.0
+    boundaries = np.array([t['start'] for t in timings] + [timings[-1]['end']])
+    pauses = [(spans[i][1] + spans[i + 1][0]) / 2 for i in range(len(spans) - 1)]
+    return float(np.mean([min(np.abs(boundaries - p).min(), MAX_ANCHOR_DISTANCE) for p in pauses]))
+
+
+# --- Sources ---
+def synth_timings(audio, words, known=None, **_):
+    """The synthesizer's own timings, when it gave any"""
+    if not known:
+        return None
+    lines = {}
+    for t in known:
+        line = lines.setdefault(t.get('line', 0), [t['start'], t['end']])
+        line[1] = t['end']
+    # Words are spread evenly within each line, so the line is the interpolation span
+    span = np.mean([end - start for start, end in lines.values()])
+    error = _pause_error(known, _speech_spans(audio)) + INTERPOLATION_ERROR * span
+    return known, error
+
+
+def energy_timings(audio, words, **_):
+    """Fit the script words to the pauses in the audio.
+
+    Word boundaries are first placed by relative word length over the voiced time.
+    Each pause is then anchored to the nearest expected boundary, in order, and the
+    words between two anchors are spread by length over that stretch of speech.
+
+    The error estimate is the mean anchor residual, counting each pause that could
+    not be anchored as MAX_ANCHOR_DISTANCE off, plus the interpolation error. With
+    no anchor at all nothing supports the placement, so the estimate is infinite.
+    """
+    spans = _speech_spans(audio)
+    if not spans or not words:
+        return None
+    weights = np.array([_word_weight(w) for w in words])
+    voiced = sum(end - start for start, end in spans)
+    # Expected voiced time at each word boundary (0 .. len(words))
+    expected = np.concatenate([[0.0], np.cumsum(weights)]) * voiced / weights.sum()
+
+    # Anchor pauses to boundaries, monotonically
+    anchors = [(0, 0)]  # (boundary index, span index where it starts)
+    voiced_before = 0.0
+    residuals = []
+    for i in range(len(spans) - 1):
+        voiced_before += spans[i][1] - spans[i][0]
+        k = int(np.argmin(np.abs(expected - voiced_before)))
+        distance = abs(expected[k] - voiced_before)
+        if anchors[-1][0] < k < len(words) and distance <= MAX_ANCHOR_DISTANCE:
+            anchors.append((k, i + 1))
+            residuals.append(distance)
+    anchors.append((len(words), len(spans)))
+
+    timings = []
+    region_lengths = []
+    for (k0, s0), (k1, s1) in zip(anchors, anchors[1:]):
+        # Speech between two anchors, with the short gaps inside it squeezed out
+        region = spans[s0:s1]
+        length = sum(end - start for start, end in region)
+        region_lengths.append(length)
+        cumulative = np.concatenate([[0.0], np.cumsum(weights[k0:k1])]) / weights[k0:k1].sum() * length
+
+        def to_time(v):
+            for start, end in region:
+                if v <= end - start:
+                    return start + v
+                v -= end - start
+            return region[-1][1]
+
+        for j, word in enumerate(words[k0:k1]):
+            timings.append({'word': word, 'start': to_time(cumulative[j]), 'end': to_time(cumulative[j + 1])})
+
+    if not residuals:
+        return timings, float('inf')
+    unanchored = len(spans) - 1 - len(residuals)
+    error = np.mean(residuals + [MAX_ANCHOR_DISTANCE] * unanchored) + INTERPOLATION_ERROR * np.mean(region_lengths)
+    return timings, float(error)
+
+
+def whisper_timings(audio, words, model_name=DEFAULT_MODEL, **_):
+    """Full transcription; the reference the other sources are judged against"""
+    return transcribe_words(audio.for_whisper(), model_name), 0.0
+
+
+# Cheapest first
+TIMING_SOURCES = {
+    'synth': synth_timings,
+    'energy': energy_timings,
+    'whisper': whisper_timings,
+}
+
+
+def word_timings(audio, script, known=None, source="auto", max_error=TIMING_MAX_ERROR, model_name=DEFAULT_MODEL,
+                 auto_sources=None):
+    """(timings, source name) for the script spoken in audio (a path or an AudioBuffer).
+
+    source="auto" takes the first of auto_sources (default TIMING_AUTO_SOURCES)
+    whose error estimate is within max_error, else Whisper; a source name forces
+    that source.
+    """
+    audio = load_audio(audio)
+    words = script_words(script)
+    if source != "auto":
+        result = TIMING_SOURCES[source](audio, words, known=known, model_name=model_name)
+        if result is None:
+            raise ValueError(f"Timing source '{source}' has no timings for this audio")
+        return result[0], source
+
+    allowed = set(TIMING_AUTO_SOURCES if auto_sources is None else auto_sources) | {'whisper'}
+    for name, timing_source in TIMING_SOURCES.items():
+        if name not in allowed:
+            continue
+        result = timing_source(audio, words, known=known, model_name=model_name)
+        if result is None:
+            continue
+        timings, error = result
+        if error <= max_error or name == 'whisper':
+            print(f"Word timings from {name} (estimated error {error:.2f}s)")
+            return timings, name
+        print(f"Skipping {name} word timings (estimated error {error:.2f}s > {max_error:.2f}s)")
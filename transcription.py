@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import numpy as np
+import whisper
+from disk_cache import DiskCache, hash_bytes, hash_file, hash_key
+
+# --- SETTINGS ---
+DEFAULT_MODEL = os.environ.get("WHISPER_MODEL", "base")
+TRANSCRIPTION_CACHE_BYTES = int(os.environ.get("TRANSCRIPTION_CACHE_MB", 64)) * 1024 * 1024
+# Options passed to model.transcribe; part of the cache key
+TRANSCRIBE_OPTIONS = {'word_timestamps': True, 'fp16': False}
+
+# Models stay loaded for the life of the process, one per size
+_models = {}
+_model_locks = {}
+_registry_lock = threading.Lock()
+_cache = None
+
+
+def load_model(model_name=DEFAULT_MODEL):
+    """Return the Whisper model `model_name`, loading it only on first use"""
+    with _registry_lock:
+        if model_name not in _models:
+            print(f"Loading Whisper model '{model_name}'...")
+            _models[model_name] = whisper.load_model(model_name)
+            _model_locks[model_name] = threading.Lock()
+        return _models[model_name], _model_locks[model_name]
+
+
+def _words_from_transcription(transcription):
+    """Flatten Whisper segments into a list of {'word', 'start', 'end'}"""
+    word_timestamps = []
+    for segment in transcription['segments']:
+        for word_info in segment["words"]:
+            word = word_info["word"].strip().lower().rstrip('.,!?')
+            if word:
+                word_timestamps.append({
+                    'word': word,
+                    'start': word_info['start'],
+                    'end': word_info['end']
+                })
+    return word_timestamps
+
+
+def audio_hash(audio):
+    """Content hash of an audio path, encoded audio bytes or a sample array"""
+    if isinstance(audio, str):
+        return hash_file(audio)
+    if isinstance(audio, np.ndarray):
+        return hash_bytes(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    return hash_bytes(bytes(audio))
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("transcriptions", TRANSCRIPTION_CACHE_BYTES, suffix=".json")
+    return _cache
+
+
+def _pack(word_timestamps):
+    """Compact column form stored in the cache"""
+    return {
+        'words': [w['word'] for w in word_timestamps],
+        'starts': [round(w['start'], 3) for w in word_timestamps],
+        'ends': [round(w['end'], 3) for w in word_timestamps],
+    }
+
+
+def _unpack(entry):
+    return [{'word': w, 'start': s, 'end': e} for w, s, e in zip(entry['words'], entry['starts'], entry['ends'])]
+
+
+def _transcribe(audio, model_name):
+    model, lock = load_model(model_name)
+    temp_path = None
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        # Whisper decodes through ffmpeg, which wants a file
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(audio)
+            temp_path = f.name
+        audio = temp_path
+    elif isinstance(audio, np.ndarray):
+        audio = audio.astype(np.float32, copy=False)
+    try:
+        print("Transcribing audio with word timestamps...")
+        # A model instance is not safe to share between concurrent transcribe calls
+        with lock:
+            transcription = model.transcribe(audio, **TRANSCRIBE_OPTIONS)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+    return _words_from_transcription(transcription)
+
+
+def transcribe_words(audio, model_name=DEFAULT_MODEL, use_cache=True, digest=None):
+    """Word timestamps for an audio path, encoded audio bytes or a 16 kHz float32 array.
+
+    Results are cached on disk by audio content, model and options, so the same
+    voice track is only ever transcribed once.
+    """
+    if not use_cache:
+        return _transcribe(audio, model_name)
+
+    key = hash_key(digest or audio_hash(audio), model_name, TRANSCRIBE_OPTIONS)
+    cache = _get_cache()
+    entry = cache.get_json(key)
+    if entry is not None:
+        print("Using cached transcription")
+        return _unpack(entry)
+
+    word_timestamps = _transcribe(audio, model_name)
+    cache.put_json(key, _pack(word_timestamps))
+    return word_timestamps
+
+
+def transcribe_words_batch(audios, model_name=DEFAULT_MODEL):
+    """Word timestamps for several inputs, transcribing each distinct one only once"""
+    results = {}
+    ordered = []
+    for audio in audios:
+        digest = audio_hash(audio)
+        if digest not in results:
+            results[digest] = transcribe_words(audio, model_name, digest=digest)
+        ordered.append(results[digest])
+    return ordered
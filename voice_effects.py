@@ -0,0 +1,211 @@
+"""Voice effects on AudioBuffers with NumPy/SciPy instead of an ffmpeg process.
+
+The chain is the same list of ffmpeg filter strings used in VOICE_SETTINGS, so a
+chain can be run by either engine: apply_effects() here, or apply_effects_ffmpeg()
+as the reference. Supported filters: atempo, equalizer, highpass, lowpass,
+compand and volume. Filter coefficients follow ffmpeg's af_biquads so the two
+engines agree to within float rounding (atempo to within its time-stretch).
+"""
+import subprocess
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import sosfilt
+from audio_buffer import AudioBuffer
+
+# --- SETTINGS ---
+# WSOLA time-stretch: frame length and search range, in seconds
+TEMPO_FRAME = 0.04
+TEMPO_SEARCH = 0.01
+# The splice search runs on a signal decimated by this factor, then is refined at full rate
+TEMPO_DECIMATE = 8
+
+
+def parse_filter(effect):
+    """('equalizer', {'f': '1000', ...}) from 'equalizer=f=1000:...'"""
+    name, _, args = effect.partition('=')
+    options = {}
+    for i, part in enumerate(args.split(':') if args else []):
+        key, sep, value = part.partition('=')
+        # A bare value is the filter's first option (atempo=1.05, volume=1.2)
+        options[key if sep else str(i)] = value if sep else key
+    return name, options
+
+
+# --- Biquads (ffmpeg af_biquads) ---
+def _alpha(w0, frequency, width_type, width):
+    if width_type == 'h':
+        return np.sin(w0) / (2 * frequency / width)
+    if width_type == 'k':
+        return np.sin(w0) / (2 * frequency / (width * 1000))
+    if width_type == 'o':
+        return np.sin(w0) * np.sinh(np.log(2.0) / 2 * width * w0 / np.sin(w0))
+    return np.sin(w0) / (2 * width)  # 'q'
+
+
+@lru_cache(maxsize=64)
+def biquad_sos(name, frequency, sample_rate, width_type='q', width=0.707, gain=0.0):
+    """One second-order section, normalized for scipy.signal.sosfilt"""
+    w0 = 2 * np.pi * frequency / sample_rate
+    alpha = _alpha(w0, frequency, width_type, width)
+    cos_w0 = np.cos(w0)
+    if name == 'equalizer':
+        A = 10 ** (gain / 40)
+        b = [1 + alpha * A, -2 * cos_w0, 1 - alpha * A]
+        a = [1 + alpha / A, -2 * cos_w0, 1 - alpha / A]
+    elif name == 'highpass':
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif name == 'lowpass':
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    else:
+        raise ValueError(f"Not a biquad filter: {name}")
+    sos = np.array([b + a]) / a[0]
+    return sos
+
+
+def _biquad(name, options, sample_rate):
+    # ffmpeg defaults: equalizer width is a Q of 1, highpass/lowpass a Q of 0.707
+    default_width = '1' if name == 'equalizer' else '0.707'
+    return biquad_sos(
+        name,
+        float(options.get('f', options.get('frequency', options.get('0')))),
+        sample_rate,
+        options.get('width_type', options.get('t', 'q')),
+        float(options.get('width', options.get('w', default_width))),
+        float(options.get('g', options.get('gain', 0))),
+    )
+
+
+# --- Compander ---
+def _parse_points(points):
+    pairs = [p.split('/') for p in points.replace(' ', '|').split('|') if p]
+    return np.array([float(x) for x, _ in pairs]), np.array([float(y) for _, y in pairs])
+
+
+def _envelope(level, attack, decay):
+    """Attack/decay follower of a rectified signal (ffmpeg compand's update_volume)"""
+    envelope = np.empty_like(level)
+    volume = 1.0  # compand's default initial volume, 0 dB
+    for i, x in enumerate(level):
+        volume += (x - volume) * (attack if x > volume else decay)
+        envelope[i] = volume
+    return envelope
+
+
+try:
+    from numba import njit
+    _envelope = njit(cache=True)(_envelope)
+except ImportError:
+    pass
+
+
+def compand(samples, sample_rate, attacks=0.05, decays=0.1, points="-70/-70|-60/-20|1/0"):
+    """Dynamic range compression of (frames, channels) samples"""
+    in_db, out_db = _parse_points(points)
+    gain_db = out_db - in_db
+    if not np.any(gain_db):
+        # An identity transfer curve (the chain in VOICE_SETTINGS) leaves the signal as it is
+        return samples
+
+    attack = 1.0 - np.exp(-1.0 / (sample_rate * attacks)) if attacks > 1 / sample_rate else 1.0
+    decay = 1.0 - np.exp(-1.0 / (sample_rate * decays)) if decays > 1 / sample_rate else 1.0
+    out = np.empty_like(samples)
+    for channel in range(samples.shape[1]):
+        envelope = _envelope(np.abs(samples[:, channel]).astype(np.float64), attack, decay)
+        level_db = 20 * np.log10(np.maximum(envelope, 1e-10))
+        out[:, channel] = samples[:, channel] * 10 ** (np.interp(level_db, in_db, gain_db) / 20)
+    return out
+
+
+# --- Time-stretch ---
+def time_stretch(samples, sample_rate, tempo):
+    """Change speed by `tempo` without changing pitch (WSOLA, like ffmpeg's atempo)"""
+    if tempo == 1.0 or len(samples) == 0:
+        return samples
+    frame = int(TEMPO_FRAME * sample_rate) // 2 * 2
+    hop = frame // 2
+    search = int(TEMPO_SEARCH * sample_rate)
+    window = np.hanning(frame + 1)[:frame].astype(np.float32)[:, None]
+
+    # Pad so every analysis frame and its search range are inside the signal
+    padded = np.pad(samples, ((frame + search, frame + search), (0, 0)))
+    output_frames = int(np.ceil(len(samples) / tempo / hop)) + 2
+    out = np.zeros(((output_frames + 1) * hop + frame, samples.shape[1]), dtype=np.float32)
+    mono = padded.mean(axis=1).astype(np.float32)
+
+    # Block means are a cheap low-passed, decimated copy for the coarse search
+    decimated = mono[:len(mono) // TEMPO_DECIMATE * TEMPO_DECIMATE].reshape(-1, TEMPO_DECIMATE).mean(axis=1)
+    coarse_frame = frame // TEMPO_DECIMATE
+    # Every candidate frame as a row, built once; slicing them per splice is free
+    coarse_windows = sliding_window_view(decimated, coarse_frame)
+    windows = sliding_window_view(mono, frame)
+
+    previous = 0  # input position of the last frame taken
+    for k in range(output_frames):
+        # Frame k is centred on input sample k * hop * tempo
+        nominal = frame + search - hop + int(round(k * hop * tempo))
+        if nominal + search + frame > len(mono):
+            break
+        if k == 0:
+            position = nominal
+        else:
+            # Pick the frame in the search range most like the natural continuation of the last one
+            low, high = nominal - search, nominal + search
+            target = (previous + hop) // TEMPO_DECIMATE
+            continuation = decimated[target:target + coarse_frame]
+            candidates = coarse_windows[low // TEMPO_DECIMATE:high // TEMPO_DECIMATE + 1]
+            coarse = (low // TEMPO_DECIMATE + int(np.argmax(candidates @ continuation))) * TEMPO_DECIMATE
+            low, high = max(low, coarse - TEMPO_DECIMATE), min(high, coarse + TEMPO_DECIMATE)
+            position = low + int(np.argmax(windows[low:high + 1] @ mono[previous + hop:previous + hop + frame]))
+        out[k * hop:k * hop + frame] += padded[position:position + frame] * window
+        previous = position
+
+    # Output sample hop lines up with input sample 0; trim to the stretched length
+    start = hop
+    length = int(round(len(samples) / tempo))
+    return out[start:start + length]
+
+
+# --- Chain ---
+def apply_effects(audio, effects):
+    """AudioBuffer with an ffmpeg-style filter chain applied, in process"""
+    samples = audio.samples.astype(np.float64)
+    sample_rate = audio.sample_rate
+    sections = []  # consecutive biquads, run as one cascade
+    for effect in effects:
+        name, options = parse_filter(effect)
+        if name in ('equalizer', 'highpass', 'lowpass'):
+            sections.append(_biquad(name, options, sample_rate))
+            continue
+        if sections:
+            samples = sosfilt(np.concatenate(sections), samples, axis=0)
+            sections = []
+        if name == 'volume':
+            samples = samples * float(options.get('volume', options.get('0')))
+        elif name == 'atempo':
+            samples = time_stretch(samples, sample_rate, float(options.get('tempo', options.get('0'))))
+        elif name == 'compand':
+            samples = compand(samples, sample_rate,
+                              attacks=float(options.get('attacks', 0.05)),
+                              decays=float(options.get('decays', 0.1)),
+                              points=options.get('points', "-70/-70|-60/-20|1/0"))
+        else:
+            raise ValueError(f"Unsupported effect: {effect}")
+    if sections:
+        samples = sosfilt(np.concatenate(sections), samples, axis=0)
+    return AudioBuffer(samples, sample_rate)
+
+
+def apply_effects_ffmpeg(audio, effects):
+    """Reference engine: the same chain run by ffmpeg, audio piped through memory"""
+    result = subprocess.run([
+        'ffmpeg',
+        '-v', 'error',
+        '-f', 'f32le', '-ar', str(audio.sample_rate), '-ac', str(audio.channels), '-i', 'pipe:0',
+        '-af', ",".join(effects),
+        '-f', 'f32le', '-ar', str(audio.sample_rate), '-ac', str(audio.channels), 'pipe:1'
+    ], input=audio.samples.astype(np.float32).tobytes(), capture_output=True, check=True)
+    return AudioBuffer(np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, audio.channels),
+                       audio.sample_rate)
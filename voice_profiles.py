@@ -0,0 +1,100 @@
+import os
+import threading
+import soundfile as sf  # For reliable audio saving
+import noisereduce as nr  # Optional
+import librosa  # For audio loading and resampling
+from disk_cache import DiskCache, hash_file, hash_key
+
+# --- SETTINGS ---
+VOICE_PROFILE_CACHE_BYTES = int(os.environ.get("VOICE_PROFILE_CACHE_MB", 256)) * 1024 * 1024
+# Bump when preprocess_audio changes so old cleaned references are not reused
+PREPROCESS_VERSION = 1
+
+_references = None
+_latents = None
+# Loaded latents for this process, keyed like the disk cache
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+# --- LIGHTWEIGHT AUDIO PREPROCESSING ---
+def preprocess_audio(input_path, output_path):
+    try:
+        # Load audio (keep original sample rate unless >44.1kHz)
+        y, sr = librosa.load(input_path, sr=None)
+        if sr > 44100:
+            y = librosa.resample(y, orig_sr=sr, target_sr=44100)
+            sr = 44100
+
+        # Only apply noise reduction if background noise exists
+        if len(y) > 0:
+            y = nr.reduce_noise(y=y, sr=sr, stationary=True, prop_decrease=0.5)  # Mild reduction
+
+        # Normalize without over-driving
+        y = y * (0.9 / max(0.01, max(abs(y))))  # Safer than librosa.util.normalize
+
+        sf.write(output_path, y, sr)
+        return output_path
+    except Exception as e:
+        print(f"Preprocessing failed: {e}")
+        return input_path  # Fallback to original
+
+
+def _caches():
+    global _references, _latents
+    if _references is None:
+        _references = DiskCache("voice_references", VOICE_PROFILE_CACHE_BYTES // 2, suffix=".wav")
+        _latents = DiskCache("voice_latents", VOICE_PROFILE_CACHE_BYTES // 2, suffix=".pt")
+    return _references, _latents
+
+
+def cleaned_reference(reference_audio):
+    """Preprocessed copy of a reference voice, computed once per file content"""
+    references, _ = _caches()
+    key = hash_key(hash_file(reference_audio), PREPROCESS_VERSION)
+    path = references.get_path(key)
+    if path is None:
+        print(f"Preprocessing reference voice {reference_audio}...")
+
+        def write(temp_path):
+            if preprocess_audio(reference_audio, temp_path) != temp_path:
+                raise RuntimeError("reference preprocessing failed")
+
+        try:
+            path = references.put_file(key, write)
+        except RuntimeError:
+            return reference_audio  # Fallback to original, as preprocess_audio does
+    return path
+
+
+def conditioning_latents(model, model_name, reference_audio):
+    """(gpt_cond_latent, speaker_embedding) for a reference voice, cached on disk and in memory"""
+    import torch
+    _, latents = _caches()
+    key = hash_key(hash_file(reference_audio), PREPROCESS_VERSION, model_name)
+
+    with _loaded_lock:
+        if key in _loaded:
+            return _loaded[key]
+
+        path = latents.get_path(key)
+        if path is not None:
+            saved = torch.load(path, map_location=model.device)
+            result = saved['gpt_cond_latent'], saved['speaker_embedding']
+        else:
+            print(f"Computing speaker latents for {reference_audio}...")
+            config = model.config
+            result = model.get_conditioning_latents(
+                audio_path=[cleaned_reference(reference_audio)],
+                gpt_cond_len=config.gpt_cond_len,
+                gpt_cond_chunk_len=config.gpt_cond_chunk_len,
+                max_ref_length=config.max_ref_len,
+                sound_norm_refs=config.sound_norm_refs,
+            )
+            latents.put_file(key, lambda temp_path: torch.save({
+                'gpt_cond_latent': result[0].cpu(),
+                'speaker_embedding': result[1].cpu(),
+            }, temp_path))
+
+        _loaded[key] = result
+        return result
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+
+# --- SETTINGS ---
+WORKSPACE_ROOT = os.environ.get("WORKSPACE_DIR", "workspaces")
+# Keep workspaces after the job for debugging
+KEEP_WORKSPACES = os.environ.get("KEEP_WORKSPACES") == "1"
+
+
+class Workspace:
+    """Private directory for one job's intermediate files, removed when the job is done.
+
+    Use it as a context manager. Functions that take an optional `workspace` create
+    and clean up their own when none is passed, so nothing is written to shared paths.
+    """
+
+    def __init__(self, name="job", keep=KEEP_WORKSPACES):
+        os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=f"{name}-", dir=WORKSPACE_ROOT)
+        self.keep = keep
+
+    def file(self, name):
+        """Path for an intermediate file inside the workspace"""
+        return os.path.join(self.path, name)
+
+    def cleanup(self):
+        if not self.keep:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+
+
+def use_workspace(workspace, name):
+    """(workspace, owned): the caller's workspace, or a new one the callee must clean up"""
+    if workspace is not None:
+        return workspace, False
+    return Workspace(name), True